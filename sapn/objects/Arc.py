@@ -1,4 +1,6 @@
 class Arc:
+    __slots__ = ("place", "transition")
+
     def __init__(self, place, transition):
         self.place = place
-        self.transition = transition
\ No newline at end of file
+        self.transition = transition
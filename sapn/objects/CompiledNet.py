@@ -0,0 +1,66 @@
+import numpy as np
+
+import _net_kernels
+
+class CompiledNet:
+    '''
+    Array representation of a Petri net for fast enabling checks and firing.
+
+    The marking is a vector M over the places, and every transition t is
+    described by its pre- and post-incidence rows pre[t] and post[t].
+    Transitions are addressed by their index, see transitions_idx.
+    '''
+    def __init__(self, places, transitions):
+        self.places = list(places)
+        self.transitions = list(transitions)
+        self.places_idx = {p.identifier: i for i, p in enumerate(self.places)}
+        self.transitions_idx = {t.identifier: i for i, t in enumerate(self.transitions)}
+
+        n_transitions, n_places = len(self.transitions), len(self.places)
+        self.pre = np.zeros((n_transitions, n_places), np.int32)
+        self.post = np.zeros((n_transitions, n_places), np.int32)
+        for t_idx, transition in enumerate(self.transitions):
+            for place in transition.input_places:
+                self.pre[t_idx, self.places_idx[place.identifier]] += 1
+            for place in transition.output_places:
+                self.post[t_idx, self.places_idx[place.identifier]] += 1
+
+        self.M = np.array([p.tokens for p in self.places], np.int32)
+
+    def _check_index(self, t):
+        # the kernels do not check bounds, so an invalid index is rejected here
+        if not 0 <= t < len(self.transitions):
+            raise IndexError(f"transition index {t} is out of range for {len(self.transitions)} transitions")
+
+    def is_enabled(self, t):
+        self._check_index(t)
+        if _net_kernels.HAVE_NUMBA:
+            return _net_kernels.is_enabled(self.pre, self.M, t)
+        return bool(np.all(self.M >= self.pre[t]))
+
+    def enabled_mask(self):
+        if _net_kernels.HAVE_NUMBA:
+            out = np.empty(len(self.transitions), np.bool_)
+            if len(self.transitions) >= _net_kernels.PARALLEL_THRESHOLD:
+                return _net_kernels.enabled_mask_parallel(self.pre, self.M, out)
+            return _net_kernels.enabled_mask(self.pre, self.M, out)
+        # all enabled transitions in one pass over the pre-incidence matrix
+        return (self.pre <= self.M).all(axis=1)
+
+    def fire(self, t):
+        if self.is_enabled(t):
+            if _net_kernels.HAVE_NUMBA:
+                _net_kernels.fire_inplace(self.pre, self.post, self.M, t)
+            else:
+                self.M -= self.pre[t]
+                self.M += self.post[t]
+        else:
+            raise ValueError("Transition is not enabled")
+
+    def write_back(self):
+        # copy the marking back to the Place objects
+        for place, tokens in zip(self.places, self.M.tolist()):
+            place.tokens = tokens
+
+    def __repr__(self):
+        return f"CompiledNet(Places: {len(self.places)}, Transitions: {len(self.transitions)})"
@@ -1,4 +1,8 @@
+import numpy as np
+
 class Place:
+    __slots__ = ("identifier", "tokens")
+
     def __init__(self, identifier, tokens=0):
         self.identifier = identifier
         self.tokens = tokens
@@ -13,4 +17,58 @@ class Place:
             raise ValueError("Not enough tokens")
 
     def __repr__(self):
-        return f"Place({self.identifier}, Tokens: {self.tokens})"
\ No newline at end of file
+        return f"Place({self.identifier}, Tokens: {self.tokens})"
+
+
+class PlacePool:
+    '''
+    Contiguous token storage for many places (structure of arrays).
+
+    The token counts of all pooled places live in one int32 array, so a
+    marking can be read or updated with a single vectorized operation.
+    '''
+    def __init__(self, n=0):
+        self.tokens = np.zeros(max(n, 1), np.int32)
+        self.names = []
+
+    def add(self, identifier, tokens=0):
+        # reserve a slot for a new place and return its index
+        idx = len(self.names)
+        if idx == len(self.tokens):
+            self.tokens = np.concatenate((self.tokens, np.zeros(len(self.tokens), np.int32)))
+        self.tokens[idx] = tokens
+        self.names.append(identifier)
+        return idx
+
+    def marking(self):
+        # a copy, a view would go stale when the pool grows into a new array
+        return self.tokens[:len(self.names)].copy()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"PlacePool(Places: {len(self.names)})"
+
+
+class PooledPlace(Place):
+    '''
+    Handle to a place whose tokens are stored in a PlacePool.
+    '''
+    __slots__ = ("_pool", "_idx")
+
+    def __init__(self, pool, identifier, tokens=0):
+        self.identifier = identifier
+        self._pool = pool
+        self._idx = pool.add(identifier, tokens)
+
+    @property
+    def tokens(self):
+        return int(self._pool.tokens[self._idx])
+
+    @tokens.setter
+    def tokens(self, value):
+        self._pool.tokens[self._idx] = value
+
+    def add_token(self, n=1):
+        self._pool.tokens[self._idx] += n
@@ -1,14 +1,35 @@
+from operator import attrgetter
+
+import numpy as np
+
+_get_tokens = attrgetter("tokens")
+
 class Transition:
+    __slots__ = ("identifier", "input_places", "output_places")
+
     def __init__(self, identifier, input_places=None, output_places=None):
         self.identifier = identifier
-        self.input_places = input_places if input_places else []
-        self.output_places = output_places if output_places else []
+        self.input_places = tuple(input_places) if input_places else ()
+        self.output_places = tuple(output_places) if output_places else ()
+        self._specialize()
+
+    def _specialize(self):
+        # switch plain transitions of the common small arities to a class without loops;
+        # the specialized classes assume distinct input places, a place listed twice
+        # needs two tokens
+        if type(self) in _SPECIALIZED_CLASSES:
+            arity = (len(self.input_places), len(self.output_places))
+            if len(set(self.input_places)) < len(self.input_places):
+                arity = None
+            self.__class__ = _SPECIALIZED.get(arity, Transition)
 
     def is_enabled(self):
-        return all(place.tokens > 0 for place in self.input_places)
+        # min over a C-level map instead of a generator inside all()
+        return min(map(_get_tokens, self.input_places), default=1) > 0
 
     def fire(self):
         if self.is_enabled():
+            # a place listed twice needs two tokens, so remove_token keeps its check
             for place in self.input_places:
                 place.remove_token()
             for place in self.output_places:
@@ -16,5 +37,114 @@ class Transition:
         else:
             raise ValueError("Transition is not enabled")
 
+    def add_input_place(self, place):
+        # the place tuples are immutable, so rebuild them (rare operation)
+        self.input_places = self.input_places + (place,)
+        self._specialize()
+
+    def add_output_place(self, place):
+        self.output_places = self.output_places + (place,)
+        self._specialize()
+
     def __repr__(self):
-        return f"Transition({self.identifier})"
\ No newline at end of file
+        return f"Transition({self.identifier})"
+
+
+class _Transition1_1(Transition):
+    __slots__ = ()
+
+    def is_enabled(self):
+        return self.input_places[0].tokens > 0
+
+    def fire(self):
+        p_in = self.input_places[0]
+        if p_in.tokens > 0:
+            p_in.tokens -= 1
+            self.output_places[0].tokens += 1
+        else:
+            raise ValueError("Transition is not enabled")
+
+
+class _Transition1_2(Transition):
+    __slots__ = ()
+
+    def is_enabled(self):
+        return self.input_places[0].tokens > 0
+
+    def fire(self):
+        p_in = self.input_places[0]
+        if p_in.tokens > 0:
+            p_in.tokens -= 1
+            p_out_1, p_out_2 = self.output_places
+            p_out_1.tokens += 1
+            p_out_2.tokens += 1
+        else:
+            raise ValueError("Transition is not enabled")
+
+
+class _Transition2_1(Transition):
+    __slots__ = ()
+
+    def is_enabled(self):
+        p_in_1, p_in_2 = self.input_places
+        return p_in_1.tokens > 0 and p_in_2.tokens > 0
+
+    def fire(self):
+        p_in_1, p_in_2 = self.input_places
+        if p_in_1.tokens > 0 and p_in_2.tokens > 0:
+            p_in_1.tokens -= 1
+            p_in_2.tokens -= 1
+            self.output_places[0].tokens += 1
+        else:
+            raise ValueError("Transition is not enabled")
+
+
+# (number of input places, number of output places) -> specialized class
+_SPECIALIZED = {(1, 1): _Transition1_1, (1, 2): _Transition1_2, (2, 1): _Transition2_1}
+_SPECIALIZED_CLASSES = (Transition, *_SPECIALIZED.values())
+
+
+class PooledTransition(Transition):
+    '''
+    Transition between places of a single PlacePool.
+
+    The indices of the input and output places are precomputed, so enabling
+    checks and firing work directly on the pool's token array.
+    '''
+    __slots__ = ("_pool", "_input_idx", "_output_idx", "_needed_idx", "_needed")
+
+    def __init__(self, identifier, input_places=None, output_places=None):
+        super().__init__(identifier, input_places, output_places)
+        self._index_places()
+
+    def _index_places(self):
+        pools = {getattr(p, "_pool", None) for p in (*self.input_places, *self.output_places)}
+        if None in pools or len(pools) > 1:
+            raise ValueError("Places must belong to the same pool")
+        self._pool = pools.pop() if pools else None
+        self._input_idx = np.array([p._idx for p in self.input_places], np.intp)
+        self._output_idx = np.array([p._idx for p in self.output_places], np.intp)
+        # tokens needed per distinct input place, a place listed twice needs two
+        self._needed_idx, self._needed = np.unique(self._input_idx, return_counts=True)
+
+    def is_enabled(self):
+        if self._pool is None:
+            return True
+        return bool(np.all(self._pool.tokens[self._needed_idx] >= self._needed))
+
+    def fire(self):
+        if self.is_enabled():
+            if self._pool is not None:
+                # ufunc.at, so places listed twice are updated twice
+                np.subtract.at(self._pool.tokens, self._input_idx, 1)
+                np.add.at(self._pool.tokens, self._output_idx, 1)
+        else:
+            raise ValueError("Transition is not enabled")
+
+    def add_input_place(self, place):
+        super().add_input_place(place)
+        self._index_places()
+
+    def add_output_place(self, place):
+        super().add_output_place(place)
+        self._index_places()
@@ -0,0 +1,48 @@
+'''
+Numba kernels for CompiledNet, loaded by _net_kernels on first use.
+
+The kernels have explicit signatures (int32 arrays, int64 indices) and are
+compiled, or loaded from Numba's cache, when this module is imported.
+'''
+from numba import njit, prange
+
+
+@njit('boolean[:](int32[:, :], int32[:], boolean[:])', cache=True, boundscheck=False)
+def enabled_mask(pre, M, out):
+    n_transitions, n_places = pre.shape
+    for t in range(n_transitions):
+        out[t] = True
+        for p in range(n_places):
+            if M[p] < pre[t, p]:
+                out[t] = False
+                break
+    return out
+
+
+@njit('boolean[:](int32[:, :], int32[:], boolean[:])', parallel=True, cache=True, boundscheck=False)
+def enabled_mask_parallel(pre, M, out):
+    n_transitions, n_places = pre.shape
+    for t in prange(n_transitions):
+        enabled = True
+        for p in range(n_places):
+            if M[p] < pre[t, p]:
+                enabled = False
+                break
+        out[t] = enabled
+    return out
+
+
+@njit('boolean(int32[:, :], int32[:], int64)', cache=True, boundscheck=False)
+def is_enabled(pre, M, t):
+    for p in range(M.shape[0]):
+        if M[p] < pre[t, p]:
+            return False
+    return True
+
+
+@njit('void(int32[:, :], int32[:, :], int32[:], int64)', cache=True, boundscheck=False)
+def fire_inplace(pre, post, M, t):
+    for p in range(M.shape[0]):
+        M[p] -= pre[t, p]
+    for p in range(M.shape[0]):
+        M[p] += post[t, p]
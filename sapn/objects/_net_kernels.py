@@ -0,0 +1,35 @@
+'''
+Numba kernels for CompiledNet.
+
+Numba is optional. HAVE_NUMBA only tells whether it is installed; without
+it CompiledNet keeps using its NumPy implementation. The kernels live in
+_nb_net_kernels and are loaded when one of them is first used, so
+importing the net classes neither imports Numba nor compiles anything.
+'''
+from importlib.util import find_spec
+
+HAVE_NUMBA = find_spec('numba') is not None
+
+# above this number of transitions enabled_mask is split across threads
+PARALLEL_THRESHOLD = 4096
+
+_KERNELS = ('enabled_mask', 'enabled_mask_parallel', 'is_enabled', 'fire_inplace')
+
+
+def _load():
+    # import the kernels and bind them here, later lookups do not go through __getattr__
+    import _nb_net_kernels
+    globals().update((name, getattr(_nb_net_kernels, name)) for name in _KERNELS)
+
+
+def __getattr__(name):
+    if HAVE_NUMBA and name in _KERNELS:
+        _load()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warmup():
+    # load the kernels now rather than on the first call
+    if HAVE_NUMBA:
+        _load()
@@ -1,14 +1,12 @@
-from typing import List, Tuple, Set, Union
-import json
+from typing import List, Tuple, Set, FrozenSet, Union, KeysView, Iterator
+import sys
 from pm4py.objects.transition_system.obj import TransitionSystem
-from pm4py.objects.transition_system.utils import add_arc_from_to
 
-from pm4py import view_transition_system
+_EMPTY = frozenset()
 
-from itertools import combinations
-from itertools import chain, combinations
-
-from copy import copy
+def _intern(name):
+    # state and event names are compared and hashed constantly, so keep one shared copy of each
+    return sys.intern(name) if isinstance(name, str) else name
 
 class SATransitionSystem(TransitionSystem):
     # class State(TransitionSystem.State):
@@ -20,12 +18,15 @@ class SATransitionSystem(TransitionSystem):
     #         return str(f"(State: {self.name}, {self.multiplicity})")
         
     class Event(object):
+        __slots__ = ('name',)
+        
         def __init__(self, name=None) -> None:
             self.name = name
         def __repr__(self) -> str:
             return str(self.name)
     
     class Transition(TransitionSystem.Transition):
+        # no __slots__ here: pm4py's TransitionSystem.Transition has none, so instances keep a __dict__ anyway
         def __init__(self, name, from_state, to_state, data=None):
             super().__init__(name, from_state, to_state, data)
             
@@ -38,8 +39,31 @@ class SATransitionSystem(TransitionSystem):
         
     def __init__(self, name=None, states=None, transitions=None, initial_states=None, events=None, state_objects=None, transition_objects=None):
         super().__init__(name, states, transitions)
-        self.initial_states = initial_states if initial_states is not None else set()
-        self.events = events if events is not None else set()
+        # take over a caller's set as is, copy any other iterable into a fresh (mutable) set
+        self.initial_states = initial_states if type(initial_states) is set else set(initial_states or _EMPTY)
+        self.events = events if type(events) is set else set(events or _EMPTY)
+        
+        # name -> object lookups, kept in sync by __add_state / __add_event
+        self._state_by_name = {s.name: s for s in self.states}
+        self._event_by_name = {e.name: e for e in self.events}
+        
+        # transition indices, kept in sync by __index_transition
+        self._transition_by_st = {}         # (from_state_name, event_name, to_state_name) -> Transition
+        self._transitions_by_event = {}     # event_name -> Set[Transition]
+        self._transitions_by_from = {}      # from_state_name -> Set[Transition]
+        self._transitions_by_to = {}        # to_state_name -> Set[Transition]
+        
+        # memoized result of get_all_state_transitions, rebuilt when dirty
+        self._all_st_cache = None
+        self._all_st_dirty = True
+        
+        # revision counter, bumped on every change to the states, events or transitions,
+        # and the query cache it guards
+        self._rev = 0
+        self._trans_cache = {}              # (query, argument) -> FrozenSet[Tuple[str, str, str]]
+        self._trans_cache_rev = 0
+        for t in self.transitions:
+            self.__index_transition(t)
     
     def read_from_json(self, path_to_json_file: str):
         '''
@@ -60,6 +84,8 @@ class SATransitionSystem(TransitionSystem):
         PARAMETERS: None
         RETURNS: None
         '''
+        # only needed here; pm4py itself, visualization included, is already loaded with TransitionSystem
+        from pm4py import view_transition_system
         view_transition_system(transition_system=self, format='png', bgcolor='white')
 
     def print_info(self):
@@ -70,8 +96,8 @@ class SATransitionSystem(TransitionSystem):
         RETURNS: None
         '''
         print(f'Initial States: {self.get_initial_states()}')
-        print(f'Events: {self.get_event_names()}')
-        print(f'States: {self.get_state_names()}')
+        print(f'Events: {set(self.get_event_names())}')
+        print(f'States: {set(self.get_state_names())}')
         print(f'State Transitions: {self.get_all_state_transitions()}')
     
     ## initial state
@@ -87,7 +113,7 @@ class SATransitionSystem(TransitionSystem):
         '''
         return self.initial_states
     
-    def set_intial_state(self, state_name: str) -> bool:
+    def set_initial_state(self, state_name: str) -> bool:
         """
         Sets an initial state for the transition system.
 
@@ -99,22 +125,18 @@ class SATransitionSystem(TransitionSystem):
         Returns:
         -------
         bool
-            True if the state is set as the initial state successfully, otherwise False.
-
-        Raises:
-        ------
-        ValueError
-            If the state with the given name is not found.
+            True if the state is set as the initial state successfully, otherwise False
+            (the state with the given name is not found).
         """
-        try:    
-            if state_name in self.get_state_names():
-                self.initial_states.add(state_name)
-                return True
-            else:
-                raise ValueError(f'State "{state_name}" not found.')
-        except ValueError as e:
-            print(f'Error: {e.args[0]}')
-            return False
+        if state_name in self._state_by_name:
+            # the initial states are not part of any cached query, so _rev is left alone
+            self.initial_states.add(_intern(state_name))
+            return True
+        print(f'Error: State "{state_name}" not found.')
+        return False
+    
+    # misspelled name kept for backward compatibility
+    set_intial_state = set_initial_state
     
     ## State
     def __add_state(self, state_name:str) -> bool:
@@ -130,9 +152,12 @@ class SATransitionSystem(TransitionSystem):
         if not state_name:
             return False
         
-        if state_name not in self.get_state_names():
+        if state_name not in self._state_by_name:
+            state_name = _intern(state_name)
             state = TransitionSystem.State(name=state_name)
             self.states.add(state)
+            self._state_by_name[state_name] = state
+            self._rev += 1
             return True
         return False
     
@@ -141,17 +166,24 @@ class SATransitionSystem(TransitionSystem):
         add state objects to the transition system
         
         PARAMETERS:
+        state_names (List[str]): names of the states
         
+        RETURNS:
+        List[str]: names of the states that were not defined before
         '''
-        state_added = []
-        for sn in state_names:
-            flag = self.__add_state(state_name=sn)
-            if flag:
-                state_added.append(sn)
+        # a single pass over the new names instead of one existence check per call to __add_state
+        existing = self._state_by_name
+        state_added = [_intern(sn) for sn in dict.fromkeys(state_names) if sn and sn not in existing]
+        for sn in state_added:
+            state = TransitionSystem.State(name=sn)
+            self.states.add(state)
+            existing[sn] = state
+        if state_added:
+            self._rev += 1
         return state_added
     
     def __ensure_state_exists(self, state_name: str):
-        if state_name not in self.get_state_names():
+        if state_name not in self._state_by_name:
             self.__add_state(state_name=state_name)
     
     def get_states(self) -> set:
@@ -166,7 +198,7 @@ class SATransitionSystem(TransitionSystem):
         '''
         return self.states
     
-    def get_state_names(self) -> set:
+    def get_state_names(self) -> KeysView:
         """
         Get the set of state names.
 
@@ -174,9 +206,9 @@ class SATransitionSystem(TransitionSystem):
         None
 
         RETURNS:
-        Set[str]: A set of state names
+        KeysView[str]: A live, set-like view of the state names
         """
-        return {s.name for s in self.states}
+        return self._state_by_name.keys()
     
     
     def get_state_by_name(self, state_name: str) -> TransitionSystem.State:
@@ -199,12 +231,10 @@ class SATransitionSystem(TransitionSystem):
             If the state with the given name is not found.
         """
         try:
-            if state_name not in self.get_state_names():
+            state = self._state_by_name.get(state_name)
+            if state is None:
                 raise ValueError(f'State with name "{state_name}" not found!')
-            
-            for s in self.states:
-                if state_name == s.name:
-                    return s
+            return state
         except ValueError as e:
             print(f'Warning: {e.args[0]}')
             return None
@@ -249,15 +279,37 @@ class SATransitionSystem(TransitionSystem):
         bool: 
             True if the event was added successfully, or if the event already exists.
         """
-        event_names = self.get_event_names()
-        if event_name not in event_names:
+        if event_name not in self._event_by_name:
+            event_name = _intern(event_name)
             event = self.Event(name=event_name)
             self.events.add(event)
+            self._event_by_name[event_name] = event
+            self._rev += 1
         return True
     
     def __ensure_event_exists(self, event_name: str):
-        if event_name not in self.get_event_names():
+        if event_name not in self._event_by_name:
             self.__add_event(event_name=event_name)
+    
+    def __add_events_batch(self, event_names: List[str]):
+        '''
+        add event objects to the transition system
+        
+        PARAMETERS:
+        event_names (List[str]): names of the events
+        
+        RETURNS:
+        List[str]: names of the events that were not defined before
+        '''
+        existing = self._event_by_name
+        event_added = [_intern(en) for en in dict.fromkeys(event_names) if en not in existing]
+        for en in event_added:
+            event = self.Event(name=en)
+            self.events.add(event)
+            existing[en] = event
+        if event_added:
+            self._rev += 1
+        return event_added
         
     
     def get_events(self) -> set:
@@ -275,7 +327,7 @@ class SATransitionSystem(TransitionSystem):
         '''
         return self.events
     
-    def get_event_names(self) -> set:
+    def get_event_names(self) -> KeysView:
         """
         Retrieves the names of all events in the transition system.
 
@@ -285,10 +337,10 @@ class SATransitionSystem(TransitionSystem):
 
         Returns:
         -------
-        Set[str]
-            A set containing the names of all events in the transition system.
+        KeysView[str]
+            A live, set-like view of the names of all events in the transition system.
         """
-        return {e.name for e in self.events}
+        return self._event_by_name.keys()
     
     def get_event_by_name(self, event_name: str) -> Event:
         """
@@ -304,13 +356,76 @@ class SATransitionSystem(TransitionSystem):
         Event or None
             The event object if found, or None if no event with the specified name exists.
         """
-        event = None
-        for e in self.events:
-            if e.name == event_name:
-                event = e
-        return event
+        return self._event_by_name.get(event_name)
     
     ## transitions
+    def __index_transition(self, transition: TransitionSystem.Transition):
+        '''
+        Register a transition object in the transition indices.
+        
+        PARAMETERS:
+        transition (TransitionSystem.Transition): the transition to be registered
+        
+        RETURNS: None
+        '''
+        from_state_name = transition.from_state.name
+        to_state_name = transition.to_state.name
+        self._transition_by_st[(from_state_name, transition.name, to_state_name)] = transition
+        self._transitions_by_event.setdefault(transition.name, set()).add(transition)
+        self._transitions_by_from.setdefault(from_state_name, set()).add(transition)
+        self._transitions_by_to.setdefault(to_state_name, set()).add(transition)
+        self._all_st_dirty = True
+        self._rev += 1
+    
+    def __cached_query(self, query: str, argument: str, index: dict):
+        '''
+        Look up the state transitions of an index entry, memoized per revision.
+        
+        PARAMETERS:
+        query (str): name of the query, part of the cache key
+        argument (str): the index key (event name or state name)
+        index (dict): the transition index to read from on a cache miss
+        
+        RETURNS:
+        FrozenSet[Tuple[str, str, str]]: the matching state transitions
+        (the transition objects themselves for the query 'transitions')
+        '''
+        cache = self._trans_cache
+        if self._trans_cache_rev != self._rev:
+            # the transition system changed since the cache was filled
+            cache.clear()
+            self._trans_cache_rev = self._rev
+        
+        key = (query, argument)
+        hit = cache.get(key)
+        if hit is None:
+            transitions = index.get(argument, ())
+            if query == 'transitions':
+                hit = frozenset(transitions)
+            else:
+                hit = frozenset((t.from_state.name, t.name, t.to_state.name) for t in transitions)
+            cache[key] = hit
+        return hit
+    
+    def __add_arc(self, event_name: str, from_state: TransitionSystem.State, to_state: TransitionSystem.State, data=None):
+        '''
+        Create a transition between two existing states and register it in the indices.
+        Same as pm4py's add_arc_from_to, but keeps hold of the new transition object.
+        
+        PARAMETERS:
+        event_name (str): name of the event
+        from_state (TransitionSystem.State): the source state
+        to_state (TransitionSystem.State): the target state
+        data: additional data associated with the transition
+        
+        RETURNS: None
+        '''
+        transition = TransitionSystem.Transition(event_name, from_state, to_state, data)
+        self.transitions.add(transition)
+        from_state.outgoing.add(transition)
+        to_state.incoming.add(transition)
+        self.__index_transition(transition)
+    
     def add_transition(self, event_name: str, from_state_name: str, to_state_name: str, data=None) -> bool:
         """
         Adds a transition between states in the transition system.
@@ -338,7 +453,7 @@ class SATransitionSystem(TransitionSystem):
         """
         # check if state transition already exsits
         st = (from_state_name, event_name, to_state_name)
-        if st in self.get_all_state_transitions():
+        if st in self._transition_by_st:
             raise ValueError(f'State transition "{st}" already exists!')
         
         # ensure the event, from_state and to_state exist
@@ -351,7 +466,7 @@ class SATransitionSystem(TransitionSystem):
         to_state = self.get_state_by_name(state_name=to_state_name)
         
         if from_state and to_state:
-            add_arc_from_to(name=event_name, fr=from_state, to=to_state, ts=self, data=data)
+            self.__add_arc(event_name=event_name, from_state=from_state, to_state=to_state, data=data)
             return True
         return False
     
@@ -381,6 +496,47 @@ class SATransitionSystem(TransitionSystem):
                 print(f"Failed to add transition {st}: {e.args[0]}")
         return added_state_transitions
     
+    def add_transitions_batch_fast(self, state_transitions: List[Tuple[str, str, str]]) -> List[Tuple[str, str, str]]:
+        """
+        Adds multiple state transitions to the transition system in linear time.
+
+        All states and events are created up front, then the transitions are added
+        without the per-transition existence checks of add_transition. Transitions
+        that already exist, or that refer to an empty state name, are skipped.
+
+        Parameters:
+        ----------
+        state_transitions : List[Tuple[str, str, str]]
+            A list of tuples, each containing the from_state_name, event name, and to_state_name.
+
+        Returns:
+        -------
+        List[Tuple[str, str, str]]
+            A list of successfully added state transitions.
+        """
+        # lists such as [from, event, to] from JSON are accepted as well
+        state_transitions = [tuple(st) for st in state_transitions]
+        
+        # create all states and events in one go, in the order in which add_transition
+        # would create them, so the state order does not change between runs
+        self.__add_states_batch(state_names=[name for st in state_transitions for name in (st[0], st[2])])
+        self.__add_events_batch(event_names=[st[1] for st in state_transitions])
+        
+        added_state_transitions = []
+        for st in state_transitions:
+            if st in self._transition_by_st:
+                continue
+            from_state_name, event_name, to_state_name = st
+            from_state = self._state_by_name.get(from_state_name)
+            to_state = self._state_by_name.get(to_state_name)
+            if from_state and to_state:
+                self.__add_arc(event_name=event_name, from_state=from_state, to_state=to_state)
+                added_state_transitions.append(st)
+        
+        # rebuild the cached state transitions once on the next request
+        self._all_st_dirty = True
+        return added_state_transitions
+    
     def get_transition(self, event_name:str, from_state_name:str, to_state_name:str) -> Union[Transition, None]:
         """
         Retrieves a specific transition object by its name and the names of its source and target states.
@@ -399,12 +555,9 @@ class SATransitionSystem(TransitionSystem):
         Transition or None
             The transition object if found, otherwise None.
         """
-        for t in self.transitions:
-            if t.name == event_name and t.from_state.name == from_state_name and t.to_state.name == to_state_name:
-                return t
-        return None
+        return self._transition_by_st.get((from_state_name, event_name, to_state_name))
     
-    def get_transitions_by_name(self, event_name: str) -> set:
+    def get_transitions_by_name(self, event_name: str) -> FrozenSet[TransitionSystem.Transition]:
         """
         Retrieves the set of transition objects associated with a specific event name in the transition system.
         
@@ -415,17 +568,32 @@ class SATransitionSystem(TransitionSystem):
 
         Returns:
         -------
-        set
+        frozenset
             A set of transitions associtated with the sepcified event name.
+            The set is cached until the transition system changes.
         """
-        transitions = set()
-        for t in self.transitions:
-            if t.name == event_name:
-                transitions.add(t)
-        return transitions
+        return self.__cached_query('transitions', event_name, self._transitions_by_event)
+    
+    def iter_transitions_by_name(self, event_name: str) -> Iterator[TransitionSystem.Transition]:
+        """
+        Iterates over the transition objects associated with a specific event name,
+        without building a set.
+        
+        Parameters:
+        ----------
+        event_name: str
+            The name of the event to filter transitions by.
+
+        Returns:
+        -------
+        Iterator[TransitionSystem.Transition]
+            The transitions associated with the specified event name.
+            The transition system must not be modified during the iteration.
+        """
+        yield from self._transitions_by_event.get(event_name, ())
     
     
-    def get_state_transition_by_event(self, event_name: str) -> Set[Tuple[str, str, str]]:
+    def get_state_transition_by_event(self, event_name: str) -> FrozenSet[Tuple[str, str, str]]:
         """
         Retrieves all state transitions associated with a given event name.
 
@@ -439,23 +607,15 @@ class SATransitionSystem(TransitionSystem):
 
         Returns:
         -------
-        Set[Tuple[str, str, str]]
+        FrozenSet[Tuple[str, str, str]]
             A set of state transitions associated with the specified event name, 
             where each transition is a tuple (from_state_name, event_name, to_state_name).
+            The set is cached until the transition system changes.
         """
-        # Initialize an empty set to store state transitions for the given event
-        state_transitions = set()
-        
-         # Iterate through all transitions and collect those that match the event name
-        for t in self.transitions:
-            if t.name == event_name:
-                st = (t.from_state.name, t.name, t.to_state.name)
-                state_transitions.add(st)
-        
-        return state_transitions
+        return self.__cached_query('event', event_name, self._transitions_by_event)
     
     
-    def get_state_transitions_by_from_state(self, from_state_name: str) -> Set[Tuple[str, str, str]]:
+    def get_state_transitions_by_from_state(self, from_state_name: str) -> FrozenSet[Tuple[str, str, str]]:
         """
         Retrieves a set of state transitions that originate from a specified source state.
 
@@ -468,20 +628,13 @@ class SATransitionSystem(TransitionSystem):
 
         Returns:
         -------
-        set
+        frozenset
             A set of tuples, each representing a state transition in the form (from_state_name, transition_name, to_state_name).
+            The set is cached until the transition system changes.
         """
-        state_transitions = set() # Initialize an empty set to store machting transitions
-        
-        for t in self.transitions:
-            if t.from_state.name == from_state_name:
-                # add the transition to the set if it matches the source state
-                st = (t.from_state.name, t.name, t.to_state.name)
-                state_transitions.add(st) 
-        
-        return state_transitions # return the set of matching transitions
+        return self.__cached_query('from_state', from_state_name, self._transitions_by_from)
     
-    def get_state_transitions_by_to_state(self, to_state_name: str) -> Set[Tuple[str, str, str]]:
+    def get_state_transitions_by_to_state(self, to_state_name: str) -> FrozenSet[Tuple[str, str, str]]:
         """
         Retrieves a set of state transitions that target a specified state.
 
@@ -494,16 +647,11 @@ class SATransitionSystem(TransitionSystem):
 
         Returns:
         -------
-        set
+        frozenset
             A set of tuples, each representing a state transition in the form (from_state_name, transition_name, to_state_name).
+            The set is cached until the transition system changes.
         """
-        state_transitions = set() # Initialize an empty set to store 
-        for t in self.transitions:
-            if t.to_state.name == to_state_name:
-                # add the transition to the set if it matches the target state
-                st = (t.from_state.name, t.name, t.to_state.name)
-                state_transitions.add(st)
-        return state_transitions
+        return self.__cached_query('to_state', to_state_name, self._transitions_by_to)
     
     def get_all_state_transitions(self) -> Set[Tuple[str, str, str]]:
         """
@@ -519,48 +667,78 @@ class SATransitionSystem(TransitionSystem):
         -------
         <set>
             A set of tuples, each representing a state transition in the form (from_state_name, event_name, to_state_name).
+            The set is cached until the next transition is added and must not be modified by the caller.
         """
-        state_transitions = set() # Initialize an empty set to store state transitions
-        
-        for t in self.transitions:
-            st = (t.from_state.name, t.name, t.to_state.name)
-            state_transitions.add(st) # Add each state transition as a tuple to the set
+        if self._all_st_dirty or self._all_st_cache is None:
+            # the keys of the transition index are exactly the state transition tuples
+            self._all_st_cache = set(self._transition_by_st)
+            self._all_st_dirty = False
             
-        return state_transitions
+        return self._all_st_cache
     
     
     def create_from_ts_dict(self, ts_dict: dict) -> bool:
+        """
+        Populates the transition system from a dictionary as produced by generate_ts_dict.
+
+        Parameters:
+        ----------
+        ts_dict : dict
+            A dictionary with the keys "events", "states", "state_transitions" and "initial_states".
+            "initial_states" may be a single state name or an iterable of state names.
+
+        Returns:
+        -------
+        bool
+            True if the transition system matches the dictionary, otherwise False.
+        """
+        self.add_transitions_batch(state_transitions=ts_dict["state_transitions"])
         
-        temp = SATransitionSystem()
-        
-        temp.add_transitions_batch(state_transitions=ts_dict["state_transitions"])
-        
-        if not temp.get_event_names() == ts_dict["events"]:
+        if not self.get_event_names() == set(ts_dict["events"]):
             return False
         
-        if not temp.get_state_names() == ts_dict["states"]:
+        if not self.get_state_names() == set(ts_dict["states"]):
             return False
         
-        if not temp.set_intial_state(state_name=ts_dict["initial_states"]):
-            return False
+        initial_states = ts_dict["initial_states"]
+        if isinstance(initial_states, str):
+            initial_states = [initial_states]
         
-        self = temp
+        for state_name in initial_states:
+            if not self.set_initial_state(state_name=state_name):
+                return False
         
         return True
     
     
     ## conversion
-    def generate_ts_dict(self):
-        try:
-            ts_dict = {
-                'events': self.get_event_names(),
-                'states': self.get_state_names(),
-                'state_transitions': self.get_all_state_transitions(),
-                'initial_states': self.get_initial_states()
-            }
-            return ts_dict
-        except ValueError as e:
-            return e.args[0]
-    
-    
-        
\ No newline at end of file
+    def generate_ts_dict(self) -> dict:
+        """
+        Describes the transition system as a dictionary.
+
+        The values are live views and cached sets of the transition system rather than copies,
+        use to_serializable to get plain lists, e.g. for writing json.
+
+        Returns:
+        -------
+        dict
+            A dictionary with the keys "events", "states", "state_transitions" and "initial_states".
+        """
+        ts_dict = {
+            'events': self._event_by_name.keys(),
+            'states': self._state_by_name.keys(),
+            'state_transitions': self.get_all_state_transitions(),
+            'initial_states': self.initial_states
+        }
+        return ts_dict
+    
+    def to_serializable(self) -> dict:
+        """
+        Same as generate_ts_dict, but with every value copied into a list.
+
+        Returns:
+        -------
+        dict
+            A dictionary with the keys "events", "states", "state_transitions" and "initial_states".
+        """
+        return {key: list(value) for key, value in self.generate_ts_dict().items()}
@@ -0,0 +1,35 @@
+'''
+Numba kernels for the region algorithms.
+
+Numba is optional. HAVE_NUMBA only tells whether it is installed; without
+it regions.py keeps using its NumPy implementation. The kernels live in
+_nb_kernels and are loaded when one of them is first used, so importing
+regions neither imports Numba nor compiles anything.
+
+The first region query with Numba then pays for importing Numba and
+compiling the kernels, or loading them from Numba's cache. Call warmup()
+to pay for it up front, e.g. before timing an experiment.
+'''
+from importlib.util import find_spec
+
+HAVE_NUMBA = find_spec('numba') is not None
+
+
+def _load():
+    # import the kernels and bind them here, later lookups do not go through __getattr__
+    from . import _nb_kernels
+    names = [name for name in vars(_nb_kernels) if name.startswith('nb_')]
+    globals().update((name, getattr(_nb_kernels, name)) for name in names)
+
+
+def __getattr__(name):
+    if HAVE_NUMBA and name.startswith('nb_'):
+        _load()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warmup():
+    # load the kernels now rather than on the first region query
+    if HAVE_NUMBA:
+        _load()
@@ -0,0 +1,160 @@
+'''
+Numba kernels for the region algorithms, loaded by _kernels on first use.
+
+The kernels work on the int32 arrays of a CompiledTS: the i-th state
+transition goes from src[i] to tgt[i] on event evt[i], and ms holds the
+multiplicity of every state.
+
+The kernels are declared with explicit signatures, so Numba compiles them
+(or loads them from its cache) when this module is imported instead of on
+the first call. Arrays are int32, scalars int64; the multiset vector ms
+may be read-only.
+'''
+import numpy as np
+from numba import njit, types
+
+_ARR = types.int32[:]
+# writable arrays are accepted for a read-only argument as well
+_RO_ARR = types.Array(types.int32, 1, 'A', readonly=True)
+
+_SIG_GRADIENTS = types.UniTuple(_ARR, 2)(_RO_ARR, _ARR, _ARR, _ARR, types.int64)
+_SIG_EXPAND = _ARR(_RO_ARR, types.int64, types.int64, _ARR, _ARR, _ARR)
+_SIG_SELECT = types.UniTuple(types.int64, 2)(_RO_ARR, _RO_ARR)
+# batched variants, one multiset per row of a matrix
+_MAT = types.int32[:, :]
+_SIG_GRADIENTS_ROWS = types.UniTuple(_MAT, 2)(_MAT, _ARR, _ARR, _ARR, types.int64)
+_SIG_EXPAND_ROWS = _MAT(_MAT, types.int64[:], types.int64[:], _ARR, _ARR, types.intp[:])
+
+
+@njit(_SIG_GRADIENTS, cache=True, boundscheck=False)
+def nb_gradients(ms, src, evt, tgt, n_events):
+    # smallest and largest gradient of every event in one pass over the transitions;
+    # events without transitions get the range (0, 0)
+    g_min = np.zeros(n_events, np.int32)
+    g_max = np.zeros(n_events, np.int32)
+    seen = np.zeros(n_events, np.bool_)
+    for i in range(src.shape[0]):
+        e = evt[i]
+        d = ms[tgt[i]] - ms[src[i]]
+        if not seen[e]:
+            g_min[e] = d
+            g_max[e] = d
+            seen[e] = True
+        elif d < g_min[e]:
+            g_min[e] = d
+        elif d > g_max[e]:
+            g_max[e] = d
+    return g_min, g_max
+
+
+@njit(_SIG_EXPAND, cache=True, boundscheck=False)
+def nb_expand_g(ms, g, e, src, evt, tgt):
+    # ms plus delta_g of every state for event e
+    delta = np.zeros(ms.shape[0], np.int32)
+    for i in range(src.shape[0]):
+        if evt[i] == e:
+            d = ms[tgt[i]] - ms[src[i]] - g
+            if d > delta[src[i]]:
+                delta[src[i]] = d
+    return ms + delta
+
+
+@njit(_SIG_EXPAND, cache=True, boundscheck=False)
+def nb_expand_G(ms, g, e, src, evt, tgt):
+    # ms plus delta_G of every state for event e
+    delta = np.zeros(ms.shape[0], np.int32)
+    for i in range(src.shape[0]):
+        if evt[i] == e:
+            d = ms[src[i]] - ms[tgt[i]] + g
+            if d > delta[tgt[i]]:
+                delta[tgt[i]] = d
+    return ms + delta
+
+
+@njit(_SIG_GRADIENTS_ROWS, cache=True, boundscheck=False)
+def nb_gradients_rows(ms_rows, src, evt, tgt, n_events):
+    # nb_gradients of every row
+    n_rows = ms_rows.shape[0]
+    g_min = np.zeros((n_rows, n_events), np.int32)
+    g_max = np.zeros((n_rows, n_events), np.int32)
+    for r in range(n_rows):
+        ms = ms_rows[r]
+        seen = np.zeros(n_events, np.bool_)
+        for i in range(src.shape[0]):
+            e = evt[i]
+            d = ms[tgt[i]] - ms[src[i]]
+            if not seen[e]:
+                g_min[r, e] = d
+                g_max[r, e] = d
+                seen[e] = True
+            elif d < g_min[r, e]:
+                g_min[r, e] = d
+            elif d > g_max[r, e]:
+                g_max[r, e] = d
+    return g_min, g_max
+
+
+@njit(_SIG_EXPAND_ROWS, cache=True, boundscheck=False)
+def nb_expand_rows_g(ms_rows, g, e, src, tgt, event_offsets):
+    # row r plus delta_g of every state for event e[r] and gradient g[r]; the state
+    # transitions are sorted by event, so only the event's block is scanned
+    out = ms_rows.copy()
+    for r in range(ms_rows.shape[0]):
+        ms = ms_rows[r]
+        delta = np.zeros(ms.shape[0], np.int32)
+        for i in range(event_offsets[e[r]], event_offsets[e[r] + 1]):
+            d = ms[tgt[i]] - ms[src[i]] - g[r]
+            if d > delta[src[i]]:
+                delta[src[i]] = d
+        out[r] += delta
+    return out
+
+
+@njit(_SIG_EXPAND_ROWS, cache=True, boundscheck=False)
+def nb_expand_rows_G(ms_rows, g, e, src, tgt, event_offsets):
+    # row r plus delta_G of every state for event e[r] and gradient g[r]
+    out = ms_rows.copy()
+    for r in range(ms_rows.shape[0]):
+        ms = ms_rows[r]
+        delta = np.zeros(ms.shape[0], np.int32)
+        for i in range(event_offsets[e[r]], event_offsets[e[r] + 1]):
+            d = ms[src[i]] - ms[tgt[i]] + g[r]
+            if d > delta[tgt[i]]:
+                delta[tgt[i]] = d
+        out[r] += delta
+    return out
+
+
+@njit(_SIG_SELECT, cache=True, boundscheck=False)
+def nb_select_event(g_min, g_max):
+    # among the events with g_min < g_max, the one whose floor((g_min+g_max)/2) has the
+    # largest absolute value, the first one on ties; (-1, 0) if there is none
+    best = -1
+    best_score = -1
+    best_g = 0
+    for e in range(g_min.shape[0]):
+        if g_min[e] < g_max[e]:
+            g = (np.int64(g_min[e]) + g_max[e]) // 2
+            if abs(g) > best_score:
+                best = e
+                best_score = abs(g)
+                best_g = g
+    return best, best_g
+
+
+def warmup():
+    # run every kernel once on a single transition, so the first real call
+    # does not pay for loading or dispatch setup
+    ms = np.zeros(1, np.int32)
+    idx = np.zeros(1, np.int32)
+    nb_gradients(ms, idx, idx, idx, 1)
+    nb_expand_g(ms, 0, 0, idx, idx, idx)
+    nb_expand_G(ms, 0, 0, idx, idx, idx)
+    nb_select_event(ms, ms)
+    rows = np.zeros((1, 1), np.int32)
+    nb_gradients_rows(rows, idx, idx, idx, 1)
+    nb_expand_rows_g(rows, np.zeros(1, np.int64), np.zeros(1, np.int64), idx, idx, np.zeros(2, np.intp))
+    nb_expand_rows_G(rows, np.zeros(1, np.int64), np.zeros(1, np.int64), idx, idx, np.zeros(2, np.intp))
+
+
+warmup()
@@ -1,10 +1,240 @@
 import random
 import math
-from pprint import pprint
-from copy import copy
-from typing import Set, Union, Dict, List
+import logging
+import multiprocessing
+from operator import itemgetter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Set, Union, Dict, List, Tuple
+
+import numpy as np
 
 from objects.sa_transition_system import SATransitionSystem
+from regions import _kernels
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompiledTS:
+    """
+    Integer encoding of a transition system as NumPy arrays (structure of arrays).
+
+    States and events are numbered in sorted name order. The i-th state transition
+    goes from state src[i] to state tgt[i] on event evt[i]. The state transitions are
+    sorted by event, so those of event e are the slice event_offsets[e]:event_offsets[e+1].
+    """
+    state_names: Tuple[str, ...]
+    event_names: Tuple[str, ...]
+    state_id: Dict[str, int]
+    event_id: Dict[str, int]
+    transitions: List[Tuple[int, int, int]]     # state transitions with state and event ids
+    src: np.ndarray
+    evt: np.ndarray
+    tgt: np.ndarray
+    event_offsets: np.ndarray           # start of each event's block, plus the total as last entry
+    event_nonempty: np.ndarray          # events with at least one state transition
+    # CSR layout: the state transitions of event e leaving state s are
+    # by_src_order[by_src_offsets[e*nS + s]:by_src_offsets[e*nS + s + 1]], likewise for entering via by_tgt_*
+    by_src_order: np.ndarray
+    by_src_offsets: np.ndarray
+    by_tgt_order: np.ndarray
+    by_tgt_offsets: np.ndarray
+    # excitation and switching set of every event as a bitset over the state ids
+    excitation_bits: List[int]
+    switching_bits: List[int]
+    # results that only depend on the transition system, filled on first use
+    # and shared by all callers, hence read-only views and tuples
+    excitation_sets: MappingProxyType = field(default=None, repr=False)
+    switching_sets: MappingProxyType = field(default=None, repr=False)
+    candidates: Tuple[MappingProxyType, ...] = field(default=None, repr=False)
+    # per-multiset results keyed by the bytes of the multiplicity vector
+    gradient_range_cache: Dict[bytes, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict, repr=False)
+    gradients_cache: Dict[bytes, Dict[str, list]] = field(default_factory=dict, repr=False)
+    
+    def event_slice(self, event_idx: int) -> slice:
+        # the state transitions of the event in src, evt and tgt
+        return slice(self.event_offsets[event_idx], self.event_offsets[event_idx + 1])
+    
+    def __getstate__(self):
+        # pickled without the cached results (the read-only views cannot be pickled),
+        # they are filled again on first use
+        state = self.__dict__.copy()
+        state.update(excitation_sets=None, switching_sets=None, candidates=None,
+                     gradient_range_cache={}, gradients_cache={})
+        return state
+
+
+def _compile_ts(transition_system: SATransitionSystem) -> CompiledTS:
+    """
+    Encodes the transition system into NumPy int32 arrays.
+
+    The result is stored on the transition system and reused until the transition system changes.
+
+    Parameters:
+    ----------
+    transition_system : SATransitionSystem
+        The transition system to be encoded.
+
+    Returns:
+    -------
+    CompiledTS
+        The encoded transition system.
+    """
+    ts = transition_system
+    rev = getattr(ts, '_rev', None)
+    cached = getattr(ts, '_compiled_ts', None)
+    if rev is not None and cached is not None and cached[0] == rev:
+        return cached[1]
+    
+    state_names = tuple(sorted(ts.get_state_names()))
+    event_names = tuple(sorted(ts.get_event_names()))
+    state_id = {s: i for i, s in enumerate(state_names)}
+    event_id = {e: i for i, e in enumerate(event_names)}
+    
+    # state transitions as (source id, event id, target id), translated in a single pass
+    # and sorted by event, so every event owns a contiguous block of the arrays
+    transitions = [(state_id[f], event_id[e], state_id[t]) for f, e, t in ts.get_all_state_transitions()]
+    transitions.sort(key=itemgetter(1))
+    src, evt, tgt = np.array(transitions, dtype=np.int32).reshape(-1, 3).T.copy()
+    counts = np.bincount(evt, minlength=len(event_names))
+    event_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+    n_slots = len(event_names) * len(state_names)
+    by_src_order, by_src_offsets = _csr_by_event_and_state(evt, src, len(state_names), n_slots)
+    by_tgt_order, by_tgt_offsets = _csr_by_event_and_state(evt, tgt, len(state_names), n_slots)
+    event_slices = [slice(event_offsets[e], event_offsets[e + 1]) for e in range(len(event_names))]
+    excitation_bits = [_to_bits(np.bincount(src[sl], minlength=len(state_names)) > 0) for sl in event_slices]
+    switching_bits = [_to_bits(np.bincount(tgt[sl], minlength=len(state_names)) > 0) for sl in event_slices]
+    
+    compiled = CompiledTS(state_names=state_names, event_names=event_names, state_id=state_id, event_id=event_id,
+                          transitions=transitions, src=src, evt=evt, tgt=tgt,
+                          event_offsets=event_offsets, event_nonempty=counts > 0,
+                          by_src_order=by_src_order, by_src_offsets=by_src_offsets,
+                          by_tgt_order=by_tgt_order, by_tgt_offsets=by_tgt_offsets,
+                          excitation_bits=excitation_bits, switching_bits=switching_bits)
+    if rev is not None:
+        ts._compiled_ts = (rev, compiled)
+    return compiled
+
+
+def _to_bits(flags: np.ndarray) -> int:
+    # pack a boolean vector over the state ids into an int, bit i is state i
+    return int.from_bytes(np.packbits(flags, bitorder='little').tobytes(), 'little')
+
+
+def _csr_by_event_and_state(evt: np.ndarray, state: np.ndarray, n_states: int, n_slots: int) -> Tuple[np.ndarray, np.ndarray]:
+    # group the state transitions by (event, state) and return the grouping order and the offsets of every group
+    keys = evt.astype(np.intp) * n_states + state
+    order = np.argsort(keys, kind='stable')
+    offsets = np.searchsorted(keys[order], np.arange(n_slots + 1))
+    return order, offsets
+
+
+def _event_gradient_range(ms_arr: np.ndarray, compiled_ts: CompiledTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the smallest and largest gradient of every event in one pass over the state transitions.
+
+    Events without state transitions get the range (0, 0).
+
+    Parameters:
+    ----------
+    ms_arr : np.ndarray
+        The multiplicities of the multiset in the state order of compiled_ts.
+    compiled_ts : CompiledTS
+        The encoded transition system.
+
+    Returns:
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        g_min and g_max, indexed by event id.
+    """
+    cts = compiled_ts
+    if _kernels.HAVE_NUMBA:
+        return _kernels.nb_gradients(ms_arr, cts.src, cts.evt, cts.tgt, len(cts.event_names))
+    
+    g_min = np.zeros(len(cts.event_names), dtype=np.int32)
+    g_max = np.zeros(len(cts.event_names), dtype=np.int32)
+    if len(cts.src):
+        gradients = ms_arr[cts.tgt] - ms_arr[cts.src]
+        starts = cts.event_offsets[:-1][cts.event_nonempty]
+        g_min[cts.event_nonempty] = np.minimum.reduceat(gradients, starts)
+        g_max[cts.event_nonempty] = np.maximum.reduceat(gradients, starts)
+    return g_min, g_max
+
+
+def _event_gradient_ranges(ms_rows: np.ndarray, compiled_ts: CompiledTS) -> Tuple[np.ndarray, np.ndarray]:
+    # _event_gradient_range of every row of a (rows, states) matrix, as two (rows, events) matrices
+    cts = compiled_ts
+    if _kernels.HAVE_NUMBA:
+        return _kernels.nb_gradients_rows(ms_rows, cts.src, cts.evt, cts.tgt, len(cts.event_names))
+    
+    g_min = np.zeros((len(ms_rows), len(cts.event_names)), dtype=np.int32)
+    g_max = np.zeros((len(ms_rows), len(cts.event_names)), dtype=np.int32)
+    if len(cts.src) and len(ms_rows):
+        gradients = ms_rows[:, cts.tgt] - ms_rows[:, cts.src]
+        starts = cts.event_offsets[:-1][cts.event_nonempty]
+        g_min[:, cts.event_nonempty] = np.minimum.reduceat(gradients, starts, axis=1)
+        g_max[:, cts.event_nonempty] = np.maximum.reduceat(gradients, starts, axis=1)
+    return g_min, g_max
+
+
+# upper bound for the number of entries in each per-multiset cache of a CompiledTS
+_CACHE_SIZE = 100_000
+
+
+def _cached_gradient_range(ms_arr: np.ndarray, compiled_ts: CompiledTS) -> Tuple[np.ndarray, np.ndarray]:
+    # _event_gradient_range, memoized per multiplicity vector
+    cache = compiled_ts.gradient_range_cache
+    fp = ms_arr.tobytes()
+    result = cache.get(fp)
+    if result is None:
+        if len(cache) >= _CACHE_SIZE:
+            cache.clear()
+        result = cache[fp] = _event_gradient_range(ms_arr, compiled_ts)
+    return result
+
+
+def _multiset_to_array(multiset: Dict[str, int], compiled_ts: CompiledTS) -> np.ndarray:
+    # multiplicities in the state order of the compiled transition system
+    if isinstance(multiset, np.ndarray):
+        # already a vector in the state order of compiled_ts; the kernels take int32
+        return np.asarray(multiset, dtype=np.int32)
+    return np.fromiter((multiset[s] for s in compiled_ts.state_names), dtype=np.int32, count=len(compiled_ts.state_names))
+
+
+class _MultisetPool:
+    """
+    Rows of multiplicity vectors in one contiguous int32 matrix.
+
+    Every distinct vector is stored once (hash-consing on its bytes), so a multiset
+    can be referred to by its row id and compared by id.
+    """
+    def __init__(self, n_states: int, capacity: int = 64):
+        self.matrix = np.empty((max(capacity, 1), n_states), dtype=np.int32)
+        self.n_rows = 0
+        self._row_of = {}
+    
+    def intern(self, ms_arr: np.ndarray) -> int:
+        # row id of the vector, appending it if it is new
+        fp = ms_arr.tobytes()
+        row = self._row_of.get(fp)
+        if row is None:
+            if self.n_rows == len(self.matrix):
+                self.matrix = np.concatenate((self.matrix, np.empty_like(self.matrix)))
+            row = self.n_rows
+            self.matrix[row] = ms_arr
+            self.n_rows += 1
+            self._row_of[fp] = row
+        return row
+    
+    def __getitem__(self, row: int) -> np.ndarray:
+        return self.matrix[row]
+    
+    def to_dict(self, row: int, state_names: Tuple[str, ...]) -> Dict[str, int]:
+        return dict(zip(state_names, self.matrix[row].tolist()))
 
 
 def create_sample_ts() -> SATransitionSystem:
@@ -26,7 +256,7 @@ def create_sample_ts() -> SATransitionSystem:
     ts.add_transitions_batch(state_transitions=state_transitions)
     
     # Set the initial state of the transition system
-    ts.set_intial_state(state_name='s_1')
+    ts.set_initial_state(state_name='s_1')
     
     # Print transition system information for verification
     ts.print_info()
@@ -68,32 +298,26 @@ def get_excitation_set_by_event(event_name: str, transition_system: SATransition
 
     Returns:
     -------
-    Union[set, None]
-        A set of states where the given event is enabled, or None if the event is not defined.
+    Union[Dict[str, int], None]
+        A new dictionary mapping every state to 1 if the given event is enabled in it and to 0
+        otherwise, or None if the event is not defined.
     """
-    try:
-        # Check if event exists in the transition system
-        if event_name in transition_system.get_event_names():
-            
-            excitation_set = {}
-            keys = transition_system.get_state_names()
-            for k in keys:
-                excitation_set[k] = 0
-            # Iterate through all state transitions and add the source state to the excitation set
-            # if the event matches the given event name
-            state_transitions = transition_system.get_all_state_transitions()
-            
-            for st in state_transitions:
-                if st[1] == event_name:
-                    excitation_set[st[0]] = 1                    
-                    
-            return dict(sorted(excitation_set.items()))
-        else:
-            raise ValueError(f'Warning: event "{event_name}" not defined!')
-    except ValueError as e:
-        print(e.args[0])
+    # Check if event exists in the transition system
+    if event_name not in transition_system.get_event_names():
+        print(f'Warning: event "{event_name}" not defined!')
         return None
     
+    cts = _compile_ts(transition_system)
+    if cts.excitation_sets is not None:
+        # a fresh dict either way, the cached sets are shared read-only views
+        return dict(cts.excitation_sets[event_name])
+    
+    # Mark the source states of all state transitions of the event
+    vec = np.zeros(len(cts.state_names), dtype=np.int32)
+    vec[cts.src[cts.event_slice(cts.event_id[event_name])]] = 1
+    
+    return dict(zip(cts.state_names, vec.tolist()))
+    
     
 def get_excitation_sets(transition_system: SATransitionSystem) -> dict:
     """
@@ -112,13 +336,20 @@ def get_excitation_sets(transition_system: SATransitionSystem) -> dict:
         A dictionary where keys are event names and values are sets of states 
         where each event is enabled.
     """
+    # The excitation sets only depend on the transition system, so they are computed once and kept on its encoding
+    cts = _compile_ts(transition_system)
+    if cts.excitation_sets is not None:
+        return cts.excitation_sets
+    
     excitation_sets = {} # Initialize an empty dictionary to store excitation sets
     events = transition_system.get_event_names() # get all the event names in the transition system
     
     for e in events:
         excitation_sets[e] = get_excitation_set_by_event(event_name=e, transition_system=transition_system)
-        
-    return excitation_sets # Return the dictionary of excitation sets
+    
+    # Share read-only views, so the cached sets cannot be modified by a caller
+    cts.excitation_sets = MappingProxyType({e: MappingProxyType(v) for e, v in excitation_sets.items()})
+    return cts.excitation_sets # Return the dictionary of excitation sets
 
 
 def get_switching_set_by_event(event_name: str, transition_system: SATransitionSystem) -> Union[Dict[str, int], None]:
@@ -134,33 +365,26 @@ def get_switching_set_by_event(event_name: str, transition_system: SATransitionS
 
     Returns:
     -------
-    set
-        A set of target states where the given event leads to a transition, or None if the event is not defined.
+    Union[Dict[str, int], None]
+        A new dictionary mapping every state to 1 if the given event leads to it and to 0
+        otherwise, or None if the event is not defined.
     """
-    try:
-        # Check if event exists in the transition system
-        if event_name in transition_system.get_event_names():
-            
-            switching_set = {}
-            keys = transition_system.get_state_names()
-            for k in keys:
-                switching_set[k] = 0
-            # Iterate through all state transitions and add the source state to the excitation set
-            # if the event matches the given event name
-            state_transitions = transition_system.get_all_state_transitions()
-            
-            for st in state_transitions:
-                if st[1] == event_name:
-                    switching_set[st[2]] = 1
-                    
-            return dict(sorted(switching_set.items()))
-        else:
-            raise ValueError(f'Warning: event "{event_name}" not defined!')
-    except ValueError as e:
-        # Print the error message and return None if the event is not defined
-        print(e.args[0])
+    # Check if event exists in the transition system
+    if event_name not in transition_system.get_event_names():
+        print(f'Warning: event "{event_name}" not defined!')
         return None
     
+    cts = _compile_ts(transition_system)
+    if cts.switching_sets is not None:
+        # a fresh dict either way, the cached sets are shared read-only views
+        return dict(cts.switching_sets[event_name])
+    
+    # Mark the target states of all state transitions of the event
+    vec = np.zeros(len(cts.state_names), dtype=np.int32)
+    vec[cts.tgt[cts.event_slice(cts.event_id[event_name])]] = 1
+    
+    return dict(zip(cts.state_names, vec.tolist()))
+    
 
 def get_switching_sets(transition_system: SATransitionSystem) -> dict:
     """
@@ -179,14 +403,21 @@ def get_switching_sets(transition_system: SATransitionSystem) -> dict:
         A dictionary where keys are event names and values are sets of target states
         where each event leads to a transition.
     """
+    # The switching sets only depend on the transition system, so they are computed once and kept on its encoding
+    cts = _compile_ts(transition_system)
+    if cts.switching_sets is not None:
+        return cts.switching_sets
+    
     switching_sets = {} # Initialize an empty dictionary to store switching sets
     events = transition_system.get_event_names() # get all the event names in the transition system
     
     # Iterate through each event and get its switching set
     for e in events:
         switching_sets[e] = get_switching_set_by_event(event_name=e, transition_system=transition_system)
-        
-    return switching_sets # Return the dictionary of switching sets
+    
+    # Share read-only views, so the cached sets cannot be modified by a caller
+    cts.switching_sets = MappingProxyType({e: MappingProxyType(v) for e, v in switching_sets.items()})
+    return cts.switching_sets # Return the dictionary of switching sets
     
 
 #     def is_preregion(event_name: str, multiset: dict, transition_system: SATransitionSystem) -> bool:
@@ -256,11 +487,11 @@ def get_power_of_multiset(multiset: dict) -> int:
     int
         The maximum multiplicity among the elements of the multiset.
     """
-    # Get the list of multiplicities from the multiset
-    values = list(multiset.values())
+    if isinstance(multiset, np.ndarray):
+        return int(multiset.max())
     
-    # Return the maximum value among the multiplicities
-    return max(values)
+    # Return the maximum value among the multiplicities, straight from the values view
+    return max(multiset.values())
 
 
 def get_k_topset(k: int, multiset: dict) -> dict:
@@ -273,19 +504,19 @@ def get_k_topset(k: int, multiset: dict) -> dict:
         The threshold value for the multiplicity.
     multiset : dict
         A dictionary representing the multiset, where keys are elements and values are their multiplicities.
+        A NumPy array of multiplicities is handled without conversion.
 
     Returns:
     -------
     dict
         A modified dictionary where elements with multiplicity less than k have their values set to zero.
+        The result has the same type as the given multiset.
     """
-    # Create a copy of the multiset to avoid modifying the original dictionary
-    temp = copy(multiset)
-    for key in list(temp.keys()):
-        if temp.get(key) < k: 
-            # if the value is smaller than k, set it to 0
-            temp[key] = 0
-    return temp
+    if isinstance(multiset, np.ndarray):
+        return np.where(multiset >= k, multiset, 0)
+    
+    # Build the result in one pass, values smaller than k are set to 0
+    return {key: (value if value >= k else 0) for key, value in multiset.items()}
     
 def get_gradient_of_event(event_name: str, multiset: dict, transition_system: SATransitionSystem) -> list:
     """
@@ -308,21 +539,19 @@ def get_gradient_of_event(event_name: str, multiset: dict, transition_system: SA
     list
         A list of gradients for the specified event.
     """
-    # Initialize an empty list to store the gradients
-    gradients = []
-    # Get all state transitions from the transition system
-    state_transitions = transition_system.get_all_state_transitions() 
-    # print(state_transitions)
-    # print(event_name)
-    # Iterate through each state transition
-    for st in state_transitions:
-        if st[1] == event_name: # Check if the event name matches
-            # Compute the gradient as the difference in multiplicity between the target and source states
-            g = multiset.get(st[2]) - multiset.get(st[0])
-            gradients.append(g) # Add the gradient to the list
-            
-    # Return the set of gradients
-    return gradients
+    cts = _compile_ts(transition_system)
+    event_idx = cts.event_id.get(event_name)
+    if event_idx is None:
+        # the event has no state transitions, so it has no gradients
+        return []
+    ms_arr = _multiset_to_array(multiset, cts)
+    return _gradient_of_event(event_idx, ms_arr, cts).tolist()
+
+
+def _gradient_of_event(event_idx: int, ms_arr: np.ndarray, compiled_ts: CompiledTS) -> np.ndarray:
+    # difference in multiplicity between the target and the source state of every state transition of the event
+    sl = compiled_ts.event_slice(event_idx)
+    return ms_arr[compiled_ts.tgt[sl]] - ms_arr[compiled_ts.src[sl]]
 
 def get_gradients_for_multisets(multiset: Dict[str, int], transition_system: SATransitionSystem) -> Dict[str, set]:
     """
@@ -340,17 +569,22 @@ def get_gradients_for_multisets(multiset: Dict[str, int], transition_system: SAT
     Dict[str, float]
         A dictionary where keys are event names and values are the computed gradients for each event.
     """
-    # Get all the event names in the transition system
-    events = transition_system.get_event_names()
+    cts = _compile_ts(transition_system)
+    # Encode the multiset once and reuse it for every event
+    ms_arr = _multiset_to_array(multiset, cts)
     
-    # Initialize an empty dictionary to store the gradients
-    gradients = {}
-    
-    # Compute the gradient for each event and store it in the dictionary
-    for e in events:
-        grad = get_gradient_of_event(e, multiset=multiset, transition_system=transition_system)
-        gradients[e] = grad
-    return gradients
+    # Results are cached per multiplicity vector; the cached lists are copied so callers may modify them
+    fp = ms_arr.tobytes()
+    cached = cts.gradients_cache.get(fp)
+    if cached is None:
+        # Compute the gradient for each event and store it in the dictionary
+        cached = {}
+        for e_idx, e in enumerate(cts.event_names):
+            cached[e] = _gradient_of_event(e_idx, ms_arr, cts).tolist()
+        if len(cts.gradients_cache) >= _CACHE_SIZE:
+            cts.gradients_cache.clear()
+        cts.gradients_cache[fp] = cached
+    return {e: list(g) for e, g in cached.items()}
     
 
 def is_subset(multiset_a, multiset_b):
@@ -377,20 +611,20 @@ def is_subset(multiset_a, multiset_b):
     ValueError
         If the keys of the multisets do not match.
     """
-    try:
-        # Check if both multisets have the same keys
-        if not multiset_a.keys() == multiset_b.keys():
-            raise ValueError('Warning: input multisets mismatch!')
-        
-        # Check if all elements in multiset_a have multiplicity less than or equal to corresponding elements in multiset_b
-        for item in list(multiset_a.items()):
-            k, v = item
-            if not v <= multiset_b.get(k):
-                return False
-        return True
-    except ValueError as e:
-        print(f'{e.args[0]}')
+    if isinstance(multiset_a, np.ndarray) and isinstance(multiset_b, np.ndarray):
+        if multiset_a.shape != multiset_b.shape:
+            print('Warning: input multisets mismatch!')
+            return False
+        return bool(np.all(multiset_a <= multiset_b))
+    
+    # Check if both multisets have the same keys
+    if not multiset_a.keys() == multiset_b.keys():
+        print('Warning: input multisets mismatch!')
         return False
+    
+    # Check if all elements in multiset_a have multiplicity less than or equal to corresponding elements in multiset_b,
+    # stopping at the first element that is larger
+    return all(v <= multiset_b[k] for k, v in multiset_a.items())
 
 
 def is_multiset_k_bounded(k: int, multiset: Dict[str, int]) -> bool:
@@ -409,11 +643,11 @@ def is_multiset_k_bounded(k: int, multiset: Dict[str, int]) -> bool:
     bool
         True if all multiplicities are less than or equal to k, otherwise False.
     """
-    # Iterate through the multiset and check if each multiplicity is less than or equal to k
-    for key in multiset.keys():
-        if not multiset[key] <= k:
-            return False
-    return True
+    if isinstance(multiset, np.ndarray):
+        return bool(np.all(multiset <= k))
+    
+    # Check if each multiplicity is less than or equal to k, stopping at the first one that is not
+    return all(v <= k for v in multiset.values())
     
 
 def get_union_of_multisets(multiset_a: Dict[str, int], multiset_b: Dict[str, int]) -> Union[Dict[str, int], None]:
@@ -440,24 +674,15 @@ def get_union_of_multisets(multiset_a: Dict[str, int], multiset_b: Dict[str, int
     ValueError
         If the keys of the two multisets do not match.
     """
-    try:
-        # Check if the keys of the two multisets match
-        if not multiset_a.keys() == multiset_b.keys():
-            raise ValueError(f'Multiset mismatch')
-        
-        # Initialize an empty dictionary to store the union of the multisets
-        union_of_multisets = {}
-        keys = multiset_a.keys()
-        
-        # Compute the union of the multisets by taking the maximum multiplicity for each key
-        for k in keys:
-            union_of_multisets[k] = max([multiset_a[k], multiset_b[k]])
-        
-        return union_of_multisets
-    except ValueError as e:
-        # Print a warning message if the keys of the multisets do not match
-        print(f"Warning: {e.args[0]}")
+    # Check if the keys of the two multisets match
+    if not multiset_a.keys() == multiset_b.keys():
+        print("Warning: Multiset mismatch")
         return None
+    
+    # Compute the union of the multisets by taking the maximum multiplicity for each key
+    union_of_multisets = {k: (a if (a := multiset_a[k]) >= (b := multiset_b[k]) else b) for k in multiset_a}
+    
+    return union_of_multisets
 
 
 def get_intersection_of_multisets(multiset_a: Dict[str, int], multiset_b: Dict[str, int]) -> Union[Dict[str, int], None]:
@@ -484,23 +709,15 @@ def get_intersection_of_multisets(multiset_a: Dict[str, int], multiset_b: Dict[s
     ValueError
         If the keys of the two multisets do not match.
     """
-    try:
-        # Check if the keys of the two multisets match
-        if not multiset_a.keys() == multiset_b.keys():
-            raise ValueError("Multisets mismatch!")
-        
-        # Initialize an empty dictionary to store the intersection of the multisets
-        intersetction_of_multisets = {}
-        keys = multiset_a.keys()
-        
-        # Compute the intersection of the multisets by taking the minimum multiplicity for each key
-        for k in keys:
-            intersetction_of_multisets[k] = min([multiset_a[k], multiset_b[k]])
-
-        return intersetction_of_multisets
-    except ValueError as e:
-        print(f"Warning: {e.args[0]}")
+    # Check if the keys of the two multisets match
+    if not multiset_a.keys() == multiset_b.keys():
+        print("Warning: Multisets mismatch!")
         return None
+    
+    # Compute the intersection of the multisets by taking the minimum multiplicity for each key
+    intersetction_of_multisets = {k: (a if (a := multiset_a[k]) <= (b := multiset_b[k]) else b) for k in multiset_a}
+    
+    return intersetction_of_multisets
 
 
 def get_difference_of_multisets(multiset_a: Dict[str, int], multiset_b: Dict[str, int]) -> Union[Dict[str, int], None]:
@@ -528,25 +745,16 @@ def get_difference_of_multisets(multiset_a: Dict[str, int], multiset_b: Dict[str
     ValueError
         If the keys of the two multisets do not match.
     """
-    try:
-        # Check if the keys of the two multisets match
-        if not multiset_a.keys() == multiset_b.keys():
-            raise ValueError("Multisets mismatch!")
-
-        # Initialize an empty dictionary to store the difference of the multisets
-        difference_of_multisets = {}
-        keys = multiset_a.keys()
-        
-        # Compute the difference of the multisets by subtracting the multiplicity in multiset_b from multiset_a
-        # Ensure the result is not less than 0
-        for k in keys:
-            difference_of_multisets[k] = max([0, multiset_a[k] - multiset_b[k]])
-        
-        return difference_of_multisets
-    except ValueError as e:
-        # Print a warning message if the keys of the multisets do not match
-        print(f"Warning: {e.args[0]}")
+    # Check if the keys of the two multisets match
+    if not multiset_a.keys() == multiset_b.keys():
+        print("Warning: Multisets mismatch!")
         return None
+    
+    # Compute the difference of the multisets by subtracting the multiplicity in multiset_b from multiset_a
+    # Ensure the result is not less than 0
+    difference_of_multisets = {k: (d if (d := multiset_a[k] - multiset_b[k]) > 0 else 0) for k in multiset_a}
+    
+    return difference_of_multisets
 
 
 def is_region(multiset: Dict[str, int], transition_system: SATransitionSystem) -> bool:
@@ -568,43 +776,42 @@ def is_region(multiset: Dict[str, int], transition_system: SATransitionSystem) -
     bool
         True if the multiset is a region (gradients for all events are uniform), otherwise False.
     """
-    # Get the gradients for the multiset in the transition system
-    gradients = get_gradients_for_multisets(multiset=multiset, transition_system=transition_system)
-    
-    # Check if the gradients for each event are uniform
-    for key in gradients.keys():
-        if not len(set(gradients[key])) == 1:
-            return False
-        
-    return True
+    cts = _compile_ts(transition_system)
+    return _is_region(_multiset_to_array(multiset, cts), cts)
+
+
+def _is_region(ms_arr: np.ndarray, compiled_ts: CompiledTS) -> bool:
+    # the gradients of an event are uniform if their smallest and largest value agree
+    g_min, g_max = _cached_gradient_range(ms_arr, compiled_ts)
+    return bool(np.all(g_min == g_max))
 
 
 def is_preregion_of_event(event_name: str, multiset: dict, transition_system: SATransitionSystem) -> bool:
     
-    # get the excitation set of the event
-    excitation_set_by_event = get_excitation_set_by_event(event_name=event_name, transition_system=transition_system)
+    cts = _compile_ts(transition_system)
+    ms_arr = _multiset_to_array(multiset, cts)
     
     # check if multiset is a region of the transition system
-    if is_region(multiset=multiset, transition_system=transition_system):
-        # check if the excitation set is subset of the region
-        if is_subset(multiset_a=excitation_set_by_event, multiset_b=multiset):
-            return True
+    g_min, g_max = _cached_gradient_range(ms_arr, cts)
+    if not np.all(g_min == g_max):
+        return False
     
-    return False
+    # the excitation set of the event is a subset of the region if it has no state outside the support of the region
+    return (cts.excitation_bits[cts.event_id[event_name]] & ~_to_bits(ms_arr > 0)) == 0
 
 
 def is_postregion_of_event(event_name: str, multiset: dict, transition_system: SATransitionSystem) -> bool:
     
-    # get the switching set of the event
-    switching_set_by_event = get_switching_set_by_event(event_name=event_name, transition_system=transition_system)
+    cts = _compile_ts(transition_system)
+    ms_arr = _multiset_to_array(multiset, cts)
     
-    # check if multiset is a region
-    if is_region(multiset=multiset, transition_system=transition_system):
-        # check if the switching set is subset of the region
-        if is_subset(multiset_a=switching_set_by_event, multiset_b=multiset):
-            return True
+    # check if multiset is a region of the transition system
+    g_min, g_max = _cached_gradient_range(ms_arr, cts)
+    if not np.all(g_min == g_max):
+        return False
     
-    return False
+    # the switching set of the event is a subset of the region if it has no state outside the support of the region
+    return (cts.switching_bits[cts.event_id[event_name]] & ~_to_bits(ms_arr > 0)) == 0
 
 
 def get_delta_g(g: int, multiset: dict, event_name: str, state_name: str, transition_system: SATransitionSystem) -> int:
@@ -632,24 +839,23 @@ def get_delta_g(g: int, multiset: dict, event_name: str, state_name: str, transi
     int
         The computed delta_g value.
     """
-    # Get all state transitions for the given event
-    state_transitions_e = transition_system.get_state_transition_by_event(event_name=event_name)
-    
-    # Initialize a list to store the computed values
-    max_values = []
+    cts = _compile_ts(transition_system)
+    e = cts.event_id.get(event_name)
+    s = cts.state_id.get(state_name)
+    # If the event or the state is unknown, no transitions are found
+    if e is None or s is None:
+        return 0
     
-    # Iterate through the state transitions and compute the values
-    for st in state_transitions_e:
-        if st[0] == state_name:
-            v = multiset[st[2]] - multiset[st[0]] - g
-            max_values.append(v)
+    # Indices of the state transitions of the event leaving the state
+    slot = e * len(cts.state_names) + s
+    idx = cts.by_src_order[cts.by_src_offsets[slot]:cts.by_src_offsets[slot + 1]]
     
     # If no transitions are found, return 0
-    if max_values == []:
+    if len(idx) == 0:
         return 0
     
-    # Compute delta_g as the maximum value in the list, or 0 if the list is empty
-    return max(0, max(max_values))
+    # Compute delta_g as the maximum over the transitions, ensuring it is not less than 0
+    return max(0, max(multiset[cts.state_names[t]] for t in cts.tgt[idx].tolist()) - multiset[state_name] - g)
 
 
 def get_delta_G(g: int, multiset: dict, event_name: str, state_name: str, transition_system: SATransitionSystem) -> int:
@@ -677,49 +883,128 @@ def get_delta_G(g: int, multiset: dict, event_name: str, state_name: str, transi
     int
         The computed delta_G value.
     """
-    # Get all state transitions for the given event
-    state_transitions_e = transition_system.get_state_transition_by_event(event_name=event_name)
-    # print(state_transitions_e)
-    # Initialize a list to store the computed values
-    max_values = []
-    
-    # Iterate through the state transitions and compute the values
-    for st in state_transitions_e:
-        if st[2] == state_name:
-            v = multiset[st[0]] - multiset[st[2]] + g
-            max_values.append(v)
+    cts = _compile_ts(transition_system)
+    e = cts.event_id.get(event_name)
+    s = cts.state_id.get(state_name)
+    # If the event or the state is unknown, no transitions are found
+    if e is None or s is None:
+        return 0
+    
+    # Indices of the state transitions of the event entering the state
+    slot = e * len(cts.state_names) + s
+    idx = cts.by_tgt_order[cts.by_tgt_offsets[slot]:cts.by_tgt_offsets[slot + 1]]
     
     # If no transitions are found, return 0
-    if max_values == []:
+    if len(idx) == 0:
         return 0
-    # print(f"max values for G: {max_values}")
-    # Compute delta_G as the maximum value in the list, ensuring it is not less than 0
-    return max(0, max(max_values))
+    
+    # Compute delta_G as the maximum over the transitions, ensuring it is not less than 0
+    return max(0, max(multiset[cts.state_names[t]] for t in cts.src[idx].tolist()) - multiset[state_name] + g)
+
+
+def _delta_g_all_states(g: int, event_idx: int, ms_arr: np.ndarray, compiled_ts: CompiledTS) -> np.ndarray:
+    # delta_g of every state for the event, one reduction over the event's transitions grouped by src state
+    cts = compiled_ts
+    n_states = len(cts.state_names)
+    offsets = cts.by_src_offsets[event_idx * n_states:(event_idx + 1) * n_states + 1]
+    delta = np.zeros(n_states, dtype=np.int32)
+    if offsets[-1] > offsets[0]:
+        idx = cts.by_src_order[offsets[0]:offsets[-1]]
+        nonempty = offsets[1:] > offsets[:-1]
+        delta[nonempty] = np.maximum.reduceat(ms_arr[cts.tgt[idx]] - ms_arr[cts.src[idx]] - g, offsets[:-1][nonempty] - offsets[0])
+    return np.maximum(delta, 0)
+
+
+def _expand_on_event(g: int, event_idx: int, ms_arr: np.ndarray, compiled_ts: CompiledTS, by_G: bool) -> np.ndarray:
+    # ms_arr expanded by delta_g (or delta_G) of every state for the event;
+    # the kernels only scan the event's block of the transition arrays
+    cts = compiled_ts
+    sl = cts.event_slice(event_idx)
+    if by_G:
+        if _kernels.HAVE_NUMBA:
+            return _kernels.nb_expand_G(ms_arr, g, event_idx, cts.src[sl], cts.evt[sl], cts.tgt[sl])
+        return ms_arr + _delta_G_all_states(g, event_idx, ms_arr, cts)
+    if _kernels.HAVE_NUMBA:
+        return _kernels.nb_expand_g(ms_arr, g, event_idx, cts.src[sl], cts.evt[sl], cts.tgt[sl])
+    return ms_arr + _delta_g_all_states(g, event_idx, ms_arr, cts)
+
+
+def _expand_rows_on_events(g: np.ndarray, events: np.ndarray, ms_rows: np.ndarray, compiled_ts: CompiledTS, by_G: bool) -> np.ndarray:
+    # _expand_on_event of every row, row r on event events[r] with gradient g[r]
+    cts = compiled_ts
+    g = g.astype(np.int64)
+    events = events.astype(np.int64)
+    if _kernels.HAVE_NUMBA:
+        kernel = _kernels.nb_expand_rows_G if by_G else _kernels.nb_expand_rows_g
+        return kernel(ms_rows, g, events, cts.src, cts.tgt, cts.event_offsets)
+    
+    # delta of every state transition for every row, 0 (no expansion) outside the row's event
+    if by_G:
+        d = ms_rows[:, cts.src] - ms_rows[:, cts.tgt] + g[:, None]
+        states = cts.tgt
+    else:
+        d = ms_rows[:, cts.tgt] - ms_rows[:, cts.src] - g[:, None]
+        states = cts.src
+    d[cts.evt[None, :] != events[:, None]] = 0
+    delta = np.zeros(ms_rows.shape, dtype=np.int64)
+    rows = np.broadcast_to(np.arange(len(ms_rows))[:, None], d.shape)
+    np.maximum.at(delta, (rows, np.broadcast_to(states, d.shape)), d)
+    return (ms_rows + delta).astype(np.int32)
 
 
 def get_multiset_expansion_on_event_by_g(g: int, event_name: str, multiset: dict, transition_system: SATransitionSystem ):
     if not multiset.keys() == transition_system.get_state_names():
         raise ValueError
     
-    multiset_expansion = {}
-    for key in multiset.keys():
-        multiset_expansion[key] = multiset[key] + get_delta_g(g=g, event_name=event_name, state_name=key, transition_system=transition_system, multiset=multiset)
+    cts = _compile_ts(transition_system)
+    ms_arr = _multiset_to_array(multiset, cts)
+    e = cts.event_id.get(event_name)
+    if e is None:
+        # an unknown event has no transitions, so nothing is expanded
+        expansion = ms_arr
+    else:
+        expansion = _expand_on_event(g, e, ms_arr, cts, by_G=False)
     
-    return multiset_expansion
+    # keep the key order of the given multiset
+    return {key: int(expansion[cts.state_id[key]]) for key in multiset.keys()}
+
+
+def _delta_G_all_states(g: int, event_idx: int, ms_arr: np.ndarray, compiled_ts: CompiledTS) -> np.ndarray:
+    # delta_G of every state for the event, one reduction over the event's transitions grouped by tgt state
+    cts = compiled_ts
+    n_states = len(cts.state_names)
+    offsets = cts.by_tgt_offsets[event_idx * n_states:(event_idx + 1) * n_states + 1]
+    delta = np.zeros(n_states, dtype=np.int32)
+    if offsets[-1] > offsets[0]:
+        idx = cts.by_tgt_order[offsets[0]:offsets[-1]]
+        nonempty = offsets[1:] > offsets[:-1]
+        delta[nonempty] = np.maximum.reduceat(ms_arr[cts.src[idx]] - ms_arr[cts.tgt[idx]] + g, offsets[:-1][nonempty] - offsets[0])
+    return np.maximum(delta, 0)
 
 
 def get_multiset_expansion_on_event_by_G(g: int, event_name: str, multiset: dict, transition_system: SATransitionSystem) -> dict:
     if not multiset.keys() == transition_system.get_state_names():
         raise ValueError
     
-    multiset_expansion = {}
-    for key in multiset.keys():
-        multiset_expansion[key] = multiset[key] + get_delta_G(g=g, event_name=event_name, state_name=key, transition_system=transition_system, multiset=multiset)
+    cts = _compile_ts(transition_system)
+    ms_arr = _multiset_to_array(multiset, cts)
+    e = cts.event_id.get(event_name)
+    if e is None:
+        # an unknown event has no transitions, so nothing is expanded
+        expansion = ms_arr
+    else:
+        expansion = _expand_on_event(g, e, ms_arr, cts, by_G=True)
     
-    return multiset_expansion
+    # keep the key order of the given multiset
+    return {key: int(expansion[cts.state_id[key]]) for key in multiset.keys()}
 
 
-def get_candidates(transition_system: SATransitionSystem) -> list:
+def get_candidates(transition_system: SATransitionSystem) -> tuple:
+    
+    # cached on the encoding of the transition system as a tuple of read-only multisets
+    cts = _compile_ts(transition_system)
+    if cts.candidates is not None:
+        return cts.candidates
     
     candidates = []
     
@@ -734,28 +1019,98 @@ def get_candidates(transition_system: SATransitionSystem) -> list:
         # print(value)
         candidates.append(value)
     
-    return candidates
+    cts.candidates = tuple(candidates)
+    return cts.candidates
 
 
 def get_illegal_events(multiset: dict, transition_system: SATransitionSystem) -> list:
-    gradients = get_gradients_for_multisets(multiset=multiset, transition_system=transition_system)
-    # print(dict(sorted(gradients.items())))
-    gradients = dict(sorted(gradients.items()))
-    # Check if the gradients for each event are uniform
+    cts = _compile_ts(transition_system)
+    return _illegal_events(_multiset_to_array(multiset, cts), cts)
+
+
+def _illegal_events(ms_arr: np.ndarray, cts: CompiledTS) -> list:
+    g_min, g_max = _cached_gradient_range(ms_arr, cts)
+    # event ids follow the sorted event names, so the events are reported in name order
     lst = []
-    for key in gradients.keys():
-        if not len(set(gradients[key])) == 1:
-            g_min = min(gradients[key])
-            g_max = max(gradients[key])
-            lst.append((key, g_min, g_max, __get_gradient_for_binary_search(g_min=g_min, g_max=g_max)))
+    for e in np.flatnonzero(g_min < g_max):
+        e_min, e_max = int(g_min[e]), int(g_max[e])
+        lst.append((cts.event_names[e], e_min, e_max, __get_gradient_for_binary_search(g_min=e_min, g_max=e_max)))
     return lst
 
 
+def _select_expansion_event(g_min: np.ndarray, g_max: np.ndarray) -> Union[Tuple[int, int], None]:
+    # Among the events with a non-constant gradient, pick the one whose binary search gradient
+    # floor((g_min+g_max)/2) has the largest absolute value, the first one in event order on ties.
+    # Returns its id and that gradient, or None if the multiset is a region.
+    if _kernels.HAVE_NUMBA:
+        e, g_e = _kernels.nb_select_event(g_min, g_max)
+        return None if e < 0 else (e, g_e)
+    g_e = (g_min.astype(np.int64) + g_max) // 2
+    score = np.where(g_min < g_max, np.abs(g_e), -1)
+    e = int(np.argmax(score)) if len(score) else 0
+    if not len(score) or score[e] < 0:
+        return None
+    return e, int(g_e[e])
+
+
+_SUBSET_CHUNK = 1024
+
+
+def _has_subset(matrix: np.ndarray) -> np.ndarray:
+    # For every row i, whether another row j that differs from it is a subset of it
+    # (matrix[j] <= matrix[i] element-wise). Rows equal to row i do not count, like the
+    # e != m filter of __remove_supersets. The (rows, rows, states) comparison is done
+    # in chunks of rows to bound the temporary.
+    binary = matrix.size > 0 and matrix.min() >= 0 and matrix.max() <= 1
+    if binary:
+        # 0/1 rows (e.g. excitation and switching sets) as bitsets, one uint64 per 64 states;
+        # row j is below row i if bits_j & bits_i == bits_j
+        packed = np.packbits(matrix.astype(bool), axis=1, bitorder='little')
+        n_words = -(-packed.shape[1] // 8)
+        matrix = np.zeros((len(packed), n_words * 8), dtype=np.uint8)
+        matrix[:, :packed.shape[1]] = packed
+        matrix = matrix.view(np.uint64)
+    result = np.zeros(len(matrix), dtype=bool)
+    for start in range(0, len(matrix), _SUBSET_CHUNK):
+        block = matrix[start:start + _SUBSET_CHUNK, None, :]
+        if binary:
+            below = np.all((matrix[None, :, :] & block) == matrix[None, :, :], axis=2)
+        else:
+            below = np.all(matrix[None, :, :] <= block, axis=2)
+        equal = np.all(matrix[None, :, :] == block, axis=2)
+        result[start:start + _SUBSET_CHUNK] = np.any(below & ~equal, axis=1)
+    return result
+
+
+def _select_expansion_events(g_min: np.ndarray, g_max: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # _select_expansion_event of every row of (rows, events) gradient ranges;
+    # the event id is -1 for rows that are regions
+    g_e = (g_min.astype(np.int64) + g_max) // 2
+    score = np.where(g_min < g_max, np.abs(g_e), -1)
+    if not score.shape[1]:
+        return np.full(len(score), -1), np.zeros(len(score), dtype=np.int64)
+    events = np.argmax(score, axis=1)
+    rows = np.arange(len(score))
+    return np.where(score[rows, events] >= 0, events, -1), g_e[rows, events]
+
+
 def is_trivial(multiset: dict) -> bool:
-    values = list(multiset.values())
-    return all(value >= 1 for value in values)
+    if isinstance(multiset, np.ndarray):
+        return bool(np.all(multiset >= 1))
+    return all(value >= 1 for value in multiset.values())
     
 
+def warmup():
+    """
+    Loads the Numba kernels of the region algorithms.
+
+    The kernels are loaded on the first region query otherwise, so that query also pays for
+    importing Numba and compiling the kernels or loading them from Numba's cache. Call this
+    before timing the region algorithms. Without Numba it does nothing.
+    """
+    _kernels.warmup()
+
+
 def generate_all_minimal_regions_o(k: int, transition_system: SATransitionSystem) -> List[dict]:
     """
     Generates all minimal regions for a given transition system.
@@ -772,100 +1127,119 @@ def generate_all_minimal_regions_o(k: int, transition_system: SATransitionSystem
 
     Returns:
     -------
-    List[dict]
-        A list of minimal regions, each represented as a dictionary.
+    Tuple[List[dict], List[dict], int]
+        The minimal regions and the explored multisets, each represented as a dictionary,
+        and the number of iterations.
+
+    Notes:
+    -----
+    A multiset is not pushed on the candidate stack while it is waiting there or after it
+    has been handled, so a multiset is taken from the stack at most once at a time. Earlier
+    versions pushed such duplicates and counted them when they were taken again, so fewer
+    explored multisets and iterations are returned than before, e.g. 79 and 123 instead of
+    100 and 144 for case 1, 15 and 38 instead of 24 and 47 for case 2, 225 and 312 instead of
+    254 and 341 for case 3. The minimal regions are the same.
+    
+    With Numba, the first region query of a process also loads the kernels, see warmup().
     """
     ts = transition_system
     minimal_multisets = []      # R
     explored_multisets = []
-    max_iterations = 1
     iterations = 0
-    candidates = get_candidates(transition_system=transition_system)  # P
+    # multisets are interned as rows of a pool and handled by their row id,
+    # they are converted back to dicts on return
+    cts = _compile_ts(transition_system)
+    pool = _MultisetPool(n_states=len(cts.state_names))
+    candidates = deque()        # P
+    # row ids of the multisets in minimal_multisets and in candidates
+    handled = set()
+    queued = set()
+    for c in get_candidates(transition_system=transition_system):
+        row = pool.intern(_multiset_to_array(c, cts))
+        if row not in queued:
+            queued.add(row)
+            candidates.append(row)
     # candidates = [{'s_0': 6, 's_1': 3, 's_2': 2, 's_3': 0, 's_4': 3, 's_5': 0, 's_6': 0}]
     # print(candidates)
     
-    # while candidates and iterations < max_iterations:
     while candidates:
         # pprint(f"Number of Candidates: {len(candidates)}", width=120)
         
-        candidate = candidates.pop()        # r
-        explored_multisets.append(candidate)
+        row = candidates.pop()        # r
+        explored_multisets.append(row)
+        queued.discard(row)
+        candidate = pool[row]
         # candidate = {'s_0': 1, 's_1': 1, 's_2': 1, 's_3': 0, 's_4': 1, 's_5': 0, 's_6': 0}
-        # print(f"candidate: {list(candidate.values())}")
+        # print(f"candidate: {candidate.tolist()}")
         
-        if candidate in minimal_multisets:
-            print("****** candidate already in minimal_multisets...")
+        if row in handled:
+            logger.debug("****** candidate already in minimal_multisets...")
         else:
-            minimal_multisets.append(candidate)
+            handled.add(row)
+            minimal_multisets.append(row)
             
-            # Check if the candidate is a valid region
-            if is_region(multiset=candidate, transition_system=ts):
-                print("Candidate is a region. Expansion is not necessary")
+            # Check if the candidate is a valid region, otherwise get the event with a non-constant
+            # gradient to expand on (same choice as __get_event_gradient_for_expansion)
+            g_min, g_max = _cached_gradient_range(candidate, cts)
+            expansion_event = _select_expansion_event(g_min, g_max)
+            if expansion_event is None:
+                logger.debug("Candidate is a region. Expansion is not necessary")
             else:
                 # print("Candidate is not a region. Expansion starts...")
-                # Get the event with a non-constant gradient
-                lst_non_constant_events = get_illegal_events(multiset=candidate, transition_system=ts)
-                # pprint(f"Illegal Events:{lst_non_constant_events}")
+                event_idx, g_e = expansion_event
+                # print(f"Chosen Event: {cts.event_names[event_idx]}, g_min: {g_min[event_idx]}, g_max: {g_max[event_idx]}, g_e: {g_e}")
                 
-                # for e in lst_non_constant_events:
-                event_name, g_min, g_max, g_e = __get_event_gradient_for_expansion(lst_non_constant_events)
-                # print(f"Chosen Event: {event_name}, g_min: {g_min}, g_max: {g_max}, g_e: {g_e}")
-
-                r_1 = get_multiset_expansion_on_event_by_g(g=g_e, event_name=event_name, multiset=candidate, transition_system=ts)
-                # print(f"r_1: {list(r_1.values())}")
-                if get_power_of_multiset(r_1) <= k and not is_trivial(r_1):
-                    # print("r_1 is a valid candidate, add to the candidates...")
-                    candidates.append(r_1)
-                else:
-                    explored_multisets.append(r_1)
-                    # print("r_1 is not valid.")
-                
-                r_2 = get_multiset_expansion_on_event_by_G(g=int(g_e+1), event_name=event_name, multiset=candidate, transition_system=ts)
-                # print(f"r_2: {list(r_2.values())}")
-                if get_power_of_multiset(r_2) <= k and not is_trivial(r_2):
-                    # print("r_2 is a valid candidate, add to the candidates...")
-                    candidates.append(r_2)
-                else:
-                    explored_multisets.append(r_2)
-                    # print("r_2 is not valid.")
+                r_1 = _expand_on_event(g_e, event_idx, candidate, cts, by_G=False)
+                r_2 = _expand_on_event(int(g_e+1), event_idx, candidate, cts, by_G=True)
+                for r_i in (r_1, r_2):
+                    # print(f"r_i: {r_i.tolist()}")
+                    row_i = pool.intern(r_i)
+                    # valid candidate: power at most k and not trivial (some multiplicity 0)
+                    if r_i.max() <= k and r_i.min() < 1:
+                        # print("r_i is a valid candidate, add to the candidates...")
+                        # skip multisets that were already handled or are waiting on the stack
+                        if row_i not in handled and row_i not in queued:
+                            queued.add(row_i)
+                            candidates.append(row_i)
+                    else:
+                        explored_multisets.append(row_i)
+                        # print("r_i is not valid.")
         
         iterations += 1
-        print(f"****************** {iterations} *********************")
+        logger.debug("****************** %d *********************", iterations)
     
-    print(f"Found Minimal Multisets: ")
-    for m in minimal_multisets:
-        print(list(m.values()))
+    # the multisets are only formatted when debug logging is on
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Found Minimal Multisets: %s", [pool[row].tolist() for row in minimal_multisets])
     
     minimal_regions = []
-    temp = []
-    # remove multisets that are not regions                
-    for ms in minimal_multisets:
-        if is_region(multiset=ms, transition_system=ts):
-            temp.append(ms)
-        iterations += 1
+    # remove multisets that are not regions, with the gradient ranges of all of them in one batch
+    g_min, g_max = _event_gradient_ranges(pool.matrix[minimal_multisets], cts)
+    temp = [row for row, row_is_region in zip(minimal_multisets, np.all(g_min == g_max, axis=1).tolist()) if row_is_region]
+    iterations += len(minimal_multisets)
     
-    print(f"Temp: ")
-    for t in temp:
-        print(list(t.values()))
+    if debug:
+        logger.debug("Temp: %s", [pool[row].tolist() for row in temp])
     
-    # make a copy of minimal_multisets
-    copy_minimal_multisets = copy(temp)
-    
-    # Remove non-minimal regions
-    for ms in temp:
-        l_filtered = [e for e in copy_minimal_multisets if e != ms]
-        if not __has_subset_of_list(multiset=ms, lst_of_multisets=l_filtered):
-            print(f"{ms.values()} does not have subset")
-            minimal_regions.append(ms)
-        else:
-            print(f"{ms.values()} has subsets")
+    # Remove non-minimal regions, all in one vectorized subset test
+    has_subset = _has_subset(pool.matrix[temp])
+    for i, row in enumerate(temp):
+        if not has_subset[i]:
+            if debug:
+                logger.debug("%s does not have subset", pool[row].tolist())
+            minimal_regions.append(row)
+        elif debug:
+            logger.debug("%s has subsets", pool[row].tolist())
         iterations += 1
     
     print(f"Number of Iterations: {iterations}")
+    minimal_regions = [pool.to_dict(row, cts.state_names) for row in minimal_regions]
+    explored_multisets = [pool.to_dict(row, cts.state_names) for row in explored_multisets]
     return minimal_regions, explored_multisets, iterations
 
 
-def generate_all_minimal_regions_v1(k: int, transition_system: SATransitionSystem):
+def generate_all_minimal_regions_v1(k: int, transition_system: SATransitionSystem, n_workers: int = 1):
     """
     Generates all minimal regions for a given transition system.
 
@@ -878,19 +1252,51 @@ def generate_all_minimal_regions_v1(k: int, transition_system: SATransitionSyste
         The maximum allowed power of a region.
     transition_system : SATransitionSystem
         The transition system containing the states and transitions.
+    n_workers : int, optional
+        The number of worker processes expanding candidates in parallel (default is 1,
+        which expands them one after another in this process). Scripts using more than
+        one worker must call this under if __name__ == '__main__'. The workers are
+        spawned and each one imports the package and compiles its Numba kernels, which
+        takes seconds; on small transition systems, such as the case studies, the
+        sequential search is much faster. The minimal regions are the same for any
+        number of workers, the returned number of iterations is not and can differ
+        between runs, since every worker only skips the multisets it has explored itself.
 
     Returns:
     -------
-    List[dict]
-        A list of minimal regions, each represented as a dictionary.
+    Tuple[List[dict], List[dict], int]
+        The minimal regions and the explored multisets, each represented as a dictionary,
+        and the number of iterations.
+
+    Notes:
+    -----
+    One iteration is counted for every candidate taken from the queue, for every multiset
+    taken from the frontier of an expansion (including multisets that turn out to be
+    explored already), and for every region checked for minimality at the end.
+    The expansion visits its frontier level by level instead of taking the multiset with
+    the largest sum first, so a multiset that is reached twice is counted differently and
+    the number of iterations differs from the one of the largest-sum-first order (e.g. 60
+    instead of 56 for case 1 with k=6). The regions and explored multisets are the same.
+    
+    With Numba, the first region query of a process also loads the kernels, see warmup().
     """
+    if n_workers < 1:
+        raise ValueError(f"n_workers must be at least 1, got {n_workers}")
+    
     ts = transition_system
     int_k = k
     
+    # multisets are handled as int32 vectors in the state order of the compiled
+    # transition system, they are converted back to dicts on return
+    cts = _compile_ts(transition_system)
+    
     discovered_minimal_regions = []     # R
     explored_multisets = []             # M
+    # bytes of the vectors in R and M, for O(1) membership tests
+    discovered_keys = set()
+    explored_keys = set()
 
-    candidates = get_candidates(transition_system=ts)    # P
+    candidates = [_multiset_to_array(c, cts) for c in get_candidates(transition_system=ts)]    # P
 
     # remove duplicates
     candidates = __remove_duplicates(list_of_multisets=candidates)
@@ -898,115 +1304,219 @@ def generate_all_minimal_regions_v1(k: int, transition_system: SATransitionSyste
     # # remove supersets
     candidates = __remove_supersets(list_of_multisets=candidates)
 
+    # one candidate per row; candidates are taken by increasing sum, the first one on ties.
+    # No candidates are added later, so a single stable sort gives the order.
+    candidates = np.array(candidates, dtype=np.int32).reshape(len(candidates), len(cts.state_names))
+    candidates = deque(candidates[np.argsort(candidates.sum(axis=1), kind='stable')])
     
     iterations = 0
+    # the multisets are only formatted when debug logging is on
+    debug = logger.isEnabledFor(logging.DEBUG)
     
-    while candidates:
-        print("****************")
-        print(f"Iteration: {iterations}")
-        print(f"Num Candidates: {len(candidates)}")
-        
-        l_candidates = [list(c.values()) for c in candidates]
-        idx = min(range(len(l_candidates)), key=lambda i: sum(l_candidates[i]))
-        
-        r_tilde = candidates.pop(idx)
-        print(f"candidate: {list(r_tilde.values())}")
-        
-        if is_region(multiset=r_tilde, transition_system=ts):
-            if not r_tilde in discovered_minimal_regions:
-                print("Candidate is a region, add to the list.")
-                discovered_minimal_regions.append(r_tilde)
-                explored_multisets.append(r_tilde)
-                iterations = iterations + 1
-            else:
-                print("Candidate is a region, already exists.")
-                iterations = iterations + 1
-        else:
-            discovered_minimal_regions, explored_multisets, niter = multiset_expansion(k=int_k, multiset=r_tilde, niter=iterations, discovered_minimal_regions=discovered_minimal_regions, explored_multisets=explored_multisets, transition_system=ts)
+    # with several workers, every worker expands one candidate of a batch and keeps its own
+    # explored multisets; the results are merged in the order of the batch. The workers are
+    # spawned rather than forked, forking is not safe once Numba's threading layer is loaded,
+    # and get the compiled transition system once.
+    executor = None
+    if n_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_expansion_worker, initargs=(cts, int_k))
+    
+    try:
+        while candidates:
+            not_regions = []
+            for _ in range(min(n_workers, len(candidates))):
+                logger.debug("Iteration: %d, Num Candidates: %d", iterations, len(candidates))
+                
+                r_tilde = candidates.popleft()
+                if debug:
+                    logger.debug("candidate: %s", r_tilde.tolist())
+                
+                if _is_region(r_tilde, cts):
+                    fp = r_tilde.tobytes()
+                    if fp not in discovered_keys:
+                        logger.debug("Candidate is a region, add to the list.")
+                        discovered_minimal_regions.append(r_tilde)
+                        discovered_keys.add(fp)
+                        explored_multisets.append(r_tilde)
+                        explored_keys.add(fp)
+                        iterations = iterations + 1
+                    else:
+                        logger.debug("Candidate is a region, already exists.")
+                        iterations = iterations + 1
+                else:
+                    not_regions.append(r_tilde)
             
-            print(f"len l_r: {len(discovered_minimal_regions)}")
-            print(f"len l_m: {len(explored_multisets)}")
-            print(f"niter: {niter}")
-
-            iterations = niter
+            if executor is None:
+                for r_tilde in not_regions:
+                    niter = _multiset_expansion(k=int_k, ms_arr=r_tilde, niter=iterations, compiled_ts=cts,
+                                                discovered=discovered_minimal_regions, discovered_keys=discovered_keys,
+                                                explored=explored_multisets, explored_keys=explored_keys)
+                    
+                    logger.debug("len l_r: %d, len l_m: %d, niter: %d", len(discovered_minimal_regions), len(explored_multisets), niter)
+                    
+                    iterations = niter
+            else:
+                for discovered, explored, niter in executor.map(_expand_in_worker, not_regions):
+                    # drop what another worker or an earlier batch has found already
+                    for lst, keys, new in ((discovered_minimal_regions, discovered_keys, discovered),
+                                           (explored_multisets, explored_keys, explored)):
+                        for ms in new:
+                            fp = ms.tobytes()
+                            if fp not in keys:
+                                keys.add(fp)
+                                lst.append(ms)
+                    iterations += niter
+    finally:
+        if executor is not None:
+            executor.shutdown()
     
-    # make a copy of minimal_multisets
-    copy_discovered_minimal_regions = copy(discovered_minimal_regions)
     temp = []
     
-    # Remove non-minimal regions
-    for ms in discovered_minimal_regions:
-        l_filtered = [e for e in copy_discovered_minimal_regions if e != ms]
-        if not __has_subset_of_list(multiset=ms, lst_of_multisets=l_filtered):
-            print(f"{ms.values()} does not have subset")
+    # Remove non-minimal regions. The regions are distinct (every region is recorded as
+    # explored and explored multisets are not added again), so no duplicates are left to remove.
+    has_subset = _has_subset(np.array(discovered_minimal_regions, dtype=np.int32).reshape(-1, len(cts.state_names)))
+    for ms, ms_has_subset in zip(discovered_minimal_regions, has_subset):
+        if not ms_has_subset:
+            if debug:
+                logger.debug("%s does not have subset", ms.tolist())
             temp.append(ms)
-        else:
-            print(f"{ms.values()} has subsets")
+        elif debug:
+            logger.debug("%s has subsets", ms.tolist())
         iterations += 1
     
-    discovered_minimal_regions = __remove_duplicates(list_of_multisets=temp)
+    discovered_minimal_regions = temp
      
     print(f"Number of Discovered Minimal Regions: {len(discovered_minimal_regions)}")
-    print(f"Number of Explored Multisets: {len(explored_multisets)}")    
+    print(f"Number of Explored Multisets: {len(explored_multisets)}")
+    discovered_minimal_regions = [dict(zip(cts.state_names, ms.tolist())) for ms in discovered_minimal_regions]
+    explored_multisets = [dict(zip(cts.state_names, ms.tolist())) for ms in explored_multisets]
     return discovered_minimal_regions, explored_multisets, iterations
 
 
 def multiset_expansion(k: int, multiset: dict, niter: int, transition_system: SATransitionSystem, discovered_minimal_regions:list, explored_multisets: list):
     
+    # as before, the regions are dicts and the explored multisets lists of multiplicities in
+    # the key order of multiset; int32 vectors in the state order of the compiled transition
+    # system are accepted as well. The expansion runs on vectors, both lists are extended in
+    # place and returned.
+    cts = _compile_ts(transition_system)
+    n_states = len(cts.state_names)
+    states = list(multiset) if isinstance(multiset, Mapping) else cts.state_names
+    order = np.fromiter((cts.state_id[s] for s in states), dtype=np.intp, count=n_states)
+    
+    def to_arr(ms):
+        if isinstance(ms, (Mapping, np.ndarray)):
+            return _multiset_to_array(ms, cts)
+        arr = np.empty(n_states, dtype=np.int32)
+        arr[order] = ms
+        return arr
+    
+    discovered = [to_arr(ms) for ms in discovered_minimal_regions]
+    explored = [to_arr(ms) for ms in explored_multisets]
+    n_discovered, n_explored = len(discovered), len(explored)
+    niter = _multiset_expansion(k=k, ms_arr=to_arr(multiset), niter=niter, compiled_ts=cts,
+                                discovered=discovered, discovered_keys={m.tobytes() for m in discovered},
+                                explored=explored, explored_keys={m.tobytes() for m in explored})
+    discovered_minimal_regions.extend(dict(zip(cts.state_names, ms.tolist())) for ms in discovered[n_discovered:])
+    explored_multisets.extend(ms[order].tolist() for ms in explored[n_explored:])
+    return discovered_minimal_regions, explored_multisets, niter
+
+
+def _multiset_expansion(k: int, ms_arr: np.ndarray, niter: int, compiled_ts: CompiledTS,
+                        discovered: list, discovered_keys: set, explored: list, explored_keys: set) -> int:
+    # multiset_expansion on the lists it is given, appending to them in place. The key sets
+    # hold the bytes of the vectors in the lists for O(1) membership tests.
+    # The search runs level by level: the gradients, the expansion events and both expansions
+    # of all multisets of a level are computed in one batch. The explored multisets and the
+    # discovered regions do not depend on the order in which the multisets are visited, the
+    # returned niter does: it counts every multiset taken from the frontier, see
+    # generate_all_minimal_regions_v1.
+    
     # local variables
     int_k = k
-    r = [multiset]
-    ts = transition_system
-    discovered = copy(discovered_minimal_regions)
-    explored = copy(explored_multisets)
-    
-    while r:
-        # get the element with the max. cardinality as the candidate
-        l_r = [list(i.values()) for i in r]
-        idx = max(range(len(l_r)), key=lambda i: sum(l_r[i]))
-        r_hat = r.pop(idx)
-        print("*"*20)
-        print(f"Number of Iteration: {niter}")
-        print(f"Chosen Candidate: {list(r_hat.values())}")
+    cts = compiled_ts
+    n_states = len(cts.state_names)
+    frontier = [ms_arr]
+    
+    while frontier:
+        logger.debug("Number of Iteration: %d, Frontier: %d", niter, len(frontier))
         
-        if  list(r_hat.values()) in explored:
-            print("Already explored. Jump to next.")
+        rows = []
+        for r_hat in frontier:
             niter += 1
-            continue
-        
-        explored.append(list(r_hat.values()))
-        
-        # Get the event with a non-constant gradient
-        lst_non_constant_events = get_illegal_events(multiset=r_hat, transition_system=ts)
-        pprint(f"Illegal Events:{lst_non_constant_events}")
-        
-        # for e in lst_non_constant_events:
-        event_name, g_min, g_max, g_e = __get_event_gradient_for_expansion(lst_non_constant_events)
-        print(f"Chosen Event: {event_name}, g_min: {g_min}, g_max: {g_max}, g_e: {g_e}")
+            fp = r_hat.tobytes()
+            if fp in explored_keys:
+                # already explored, jump to next
+                continue
+            explored.append(r_hat)
+            explored_keys.add(fp)
+            rows.append(r_hat)
+        rows = np.array(rows, dtype=np.int32).reshape(-1, n_states)
         
-        # Expand the multiset based on the chosen illegal event and g
-        r_1 = get_multiset_expansion_on_event_by_g(g=g_e, event_name=event_name, multiset=r_hat, transition_system=ts)
-        print(f"r_1: {list(r_1.values())}")
+        # Get the event with a non-constant gradient of every multiset (same choice as
+        # __get_event_gradient_for_expansion); multisets that are regions are not expanded
+        g_min, g_max = _event_gradient_ranges(rows, cts)
+        events, g_e = _select_expansion_events(g_min, g_max)
+        not_region = events >= 0
+        rows, events, g_e = rows[not_region], events[not_region], g_e[not_region]
         
-        r_2 = get_multiset_expansion_on_event_by_G(g=int(g_e+1), event_name=event_name, multiset=r_hat, transition_system=ts)
-        print(f"r_2: {list(r_2.values())}")
+        # Expand the multisets based on their illegal event and g, r_1 and r_2 of every multiset in turn
+        r_1 = _expand_rows_on_events(g_e, events, rows, cts, by_G=False)
+        r_2 = _expand_rows_on_events(g_e + 1, events, rows, cts, by_G=True)
+        children = np.stack((r_1, r_2), axis=1).reshape(-1, n_states)
         
+        # children that are explored already are skipped below, so they are dropped before
+        # their gradients are computed
+        keys = [i.tobytes() for i in children]
+        known = [fp in explored_keys for fp in keys]
+        if any(known):
+            keys = [fp for fp, i_known in zip(keys, known) if not i_known]
+            children = children[~np.array(known)]
         
+        # valid candidates have a power of at most k and are not trivial, i.e. some multiplicity
+        # is 0; one max and one min reduction per row
+        valid = (children.max(axis=1, initial=0) <= int_k) & (children.min(axis=1, initial=1) < 1)
+        c_min, c_max = _event_gradient_ranges(children, cts)
+        is_region = np.all(c_min == c_max, axis=1)
         
-        for i in [r_1, r_2]:
-            if list(i.values()) in explored:
+        frontier = []
+        for i, fp, i_valid, i_region in zip(children, keys, valid.tolist(), is_region.tolist()):
+            # r_1 and r_2 of one level may coincide with each other
+            if fp in explored_keys:
                 continue
             else:
-                if __is_valid_candidate(k=int_k, multiset=i):
-                    if is_region(multiset=i, transition_system=ts):
+                if i_valid:
+                    if i_region:
                         discovered.append(i)
-                        explored.append(list(i.values()))
+                        discovered_keys.add(fp)
+                        explored.append(i)
+                        explored_keys.add(fp)
                         continue
-                    r.append(i)
+                    frontier.append(i)
                 else:
-                    explored.append(list(i.values()))
-                    
-        niter += 1      
+                    explored.append(i)
+                    explored_keys.add(fp)
+    return niter
+
+
+# state of an expansion worker process, set up once by _init_expansion_worker
+_worker_state = {}
+
+
+def _init_expansion_worker(compiled_ts: CompiledTS, k: int):
+    _worker_state.update(compiled_ts=compiled_ts, k=k, discovered_keys=set(), explored_keys=set())
+
+
+def _expand_in_worker(ms_arr: np.ndarray) -> Tuple[list, list, int]:
+    # _multiset_expansion of one candidate; returns the regions and multisets it added
+    # and its number of iterations. The key sets stay in the worker, so a worker does
+    # not explore a multiset twice.
+    state = _worker_state
+    discovered, explored = [], []
+    niter = _multiset_expansion(k=state['k'], ms_arr=ms_arr, niter=0, compiled_ts=state['compiled_ts'],
+                                discovered=discovered, discovered_keys=state['discovered_keys'],
+                                explored=explored, explored_keys=state['explored_keys'])
     return discovered, explored, niter
 
 
@@ -1015,9 +1525,9 @@ def __remove_duplicates(list_of_multisets: list):
     unique_dicts = []
     
     for d in list_of_multisets:
-        # Convert dictionary to a sorted tuple of items
-        t = tuple(sorted(d.items()))
-        # Check if the tuple is not in the seen set
+        # Key the dictionary by the frozenset of its items (no sorting), vectors by their bytes
+        t = d.tobytes() if isinstance(d, np.ndarray) else frozenset(d.items())
+        # Check if the key is not in the seen set
         if t not in seen:
             seen.add(t)
             unique_dicts.append(d)
@@ -1026,26 +1536,13 @@ def __remove_duplicates(list_of_multisets: list):
     return unique_dicts
 
 def __remove_supersets(list_of_multisets: list):
-    temp = []
-    
-    for m in list_of_multisets:
-        l_filtered = [e for e in list_of_multisets if e != m]
-        if not __has_subset_of_list(multiset=m, lst_of_multisets=l_filtered):
-            temp.append(m)  
-    return temp    
+    # the multisets are vectors of the same length
+    if not list_of_multisets:
+        return []
+    has_subset = _has_subset(np.stack(list_of_multisets))
+    return [m for m, m_has_subset in zip(list_of_multisets, has_subset) if not m_has_subset]
     
 
-def __is_minimal_region(k: int, multiset: dict, minimal_regions: list) -> bool:
-    if __is_valid_candidate(k=k, multiset=multiset):
-        if not multiset in minimal_regions:
-            if not __has_subset_of_list(multiset=multiset, lst_of_multisets=minimal_regions):
-                return True
-    return False
-
-
-def __is_valid_candidate(k: int, multiset: dict) -> bool:
-    return get_power_of_multiset(multiset=multiset) <= k and not is_trivial(multiset=multiset)
-
 def __get_event_gradient_for_expansion(tuples_list):
     """
     Returns the tuple with the maximal absolute value of the fourth element.
@@ -1068,15 +1565,6 @@ def __get_event_gradient_for_expansion(tuples_list):
 def __get_gradient_for_binary_search(g_min: int, g_max: int):
     return int(math.floor((g_min+g_max)/2))
 
-def __remove_duplicates_from_list(lst: list, target) -> list:
-    return [d for d in lst if not all(d.get(k) == v for k, v in target.items())]
-
-
-def __has_subset_of_list(multiset: dict, lst_of_multisets: list) -> bool:
-    for m in lst_of_multisets:
-        if is_subset(multiset_a=m, multiset_b=multiset):
-            return True
-    return False
 #     def __gen_candidates(self, given_set):
 #         # Convert the set to a list for easier manipulation
 #         s = list(given_set)
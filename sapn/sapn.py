@@ -1,7 +1,9 @@
 from Place import Place
 from Transition import Transition
 from Arc import Arc
+from CompiledNet import CompiledNet
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import XMLGenerator
 
 class StructuralAdaptivePN:
     def __init__(self):
@@ -32,43 +34,70 @@ class StructuralAdaptivePN:
             raise ValueError("Place does not exist")
 
     # Additional methods for adding, removing, and modifying transitions and arcs
+
+    def compile(self):
+        return CompiledNet(self.places.values(), self.transitions.values())
     
     def import_from_pnml(self, pnml_file_path):
-        tree = ET.parse(pnml_file_path)
-        root = tree.getroot()
-        
         # Assuming a simple PNML structure. Adjust as necessary.
-        for place in root.findall(".//place"):
-            place_id = place.attrib.get('id')
-            tokens = int(place.find(".//initialMarking/value").text) if place.find(".//initialMarking/value") is not None else 0
-            self.add_place(place_id, tokens)
+        # Single streaming pass: places are added as they are read, arcs are indexed by
+        # their endpoints, and the transitions are resolved against that index at the end.
+        transition_ids = []
+        arcs_by_target = {}     # node id -> ids of the arc sources, in document order
+        arcs_by_source = {}     # node id -> ids of the arc targets, in document order
+        for _, element in ET.iterparse(pnml_file_path, events=("end",)):
+            if element.tag == "place":
+                value = element.find(".//initialMarking/value")
+                tokens = int(value.text) if value is not None else 0
+                self.add_place(element.attrib.get('id'), tokens)
+            elif element.tag == "transition":
+                transition_ids.append(element.attrib.get('id'))
+            elif element.tag == "arc":
+                source, target = element.attrib.get('source'), element.attrib.get('target')
+                arcs_by_target.setdefault(target, []).append(source)
+                arcs_by_source.setdefault(source, []).append(target)
+            else:
+                continue
+            # done with the element, drop its content
+            element.clear()
         
-        for transition in root.findall(".//transition"):
-            transition_id = transition.attrib.get('id')
-            input_places = [arc.attrib.get('source') for arc in root.findall(f".//arc[@target='{transition_id}']")]
-            output_places = [arc.attrib.get('target') for arc in root.findall(f".//arc[@source='{transition_id}']")]
+        for transition_id in transition_ids:
+            input_places = arcs_by_target.get(transition_id, [])
+            output_places = arcs_by_source.get(transition_id, [])
             self.add_transition(transition_id, input_places, output_places)    
 
     def export_to_pnml(self, pnml_file_path):
-        net = ET.Element("pnml")
-        net.attrib = {"type": "http://www.pnml.org/version-2009/grammar/pnmlcoremodel"}
-        page = ET.SubElement(net, "page", id="page0")
+        # written element by element as it is generated, without building a tree first
+        with open(pnml_file_path, 'wb') as out:
+            xg = XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+            xg.startDocument()
+            xg.startElement("pnml", {"type": "http://www.pnml.org/version-2009/grammar/pnmlcoremodel"})
+            xg.startElement("page", {"id": "page0"})
+
+            for place_id, place in self.places.items():
+                xg.startElement("place", {"id": place_id})
+                xg.startElement("initialMarking", {})
+                xg.startElement("value", {})
+                xg.characters(str(place.tokens))
+                xg.endElement("value")
+                xg.endElement("initialMarking")
+                xg.endElement("place")
 
-        for place_id, place in self.places.items():
-            place_element = ET.SubElement(page, "place", id=place_id)
-            tokens_element = ET.SubElement(place_element, "initialMarking")
-            value_element = ET.SubElement(tokens_element, "value")
-            value_element.text = str(place.tokens)
+            # (id, source, target) of the arcs of every transition, input arcs first
+            arcs = {transition_id: [(f"a{p.identifier}to{transition_id}", p.identifier, transition_id) for p in transition.input_places]
+                                   + [(f"a{transition_id}to{p.identifier}", transition_id, p.identifier) for p in transition.output_places]
+                    for transition_id, transition in self.transitions.items()}
 
-        for transition_id, transition in self.transitions.items():
-            transition_element = ET.SubElement(page, "transition", id=transition_id)
-            for input_place in transition.input_places:
-                ET.SubElement(page, "arc", id=f"a{input_place.identifier}to{transition_id}", source=input_place.identifier, target=transition_id)
-            for output_place in transition.output_places:
-                ET.SubElement(page, "arc", id=f"a{transition_id}to{output_place.identifier}", source=transition_id, target=output_place.identifier)
+            for transition_id, transition_arcs in arcs.items():
+                xg.startElement("transition", {"id": transition_id})
+                xg.endElement("transition")
+                for arc_id, source, target in transition_arcs:
+                    xg.startElement("arc", {"id": arc_id, "source": source, "target": target})
+                    xg.endElement("arc")
 
-        tree = ET.ElementTree(net)
-        tree.write(pnml_file_path, encoding='utf-8', xml_declaration=True)
+            xg.endElement("page")
+            xg.endElement("pnml")
+            xg.endDocument()
 
     def __repr__(self):
         return f"StructuralAdaptivePetriNet(Places: {list(self.places.keys())}, Transitions: {list(self.transitions.keys())})"
\ No newline at end of file